@@ -1,48 +1,135 @@
 import os
-import csv
 import random
+import signal
+import threading
 import numpy as np
-from collections import deque
-from game import SnakeGameAI, Direction, Point
+from game import SnakeGameAI, Direction, Point, BLOCK_SIZE
+from observation import observation_size, state_dtype, game_rich_features
 from model import ManualModel
-from helper import plot
+from policy import PolicyCache
+from replay import ReplayBuffer, PrioritizedReplayBuffer
+from helper import ProgressPlotter
+from logger import TrainingLogger, clear_logs, truncate_logs
+from profiler import TrainingProfiler, NullProfiler
+from episodes import EpisodeRecorder, clear_recordings
+from pipeline import LearnerThread
+from checkpoint import Checkpointer, load_checkpoints, check_board, restore_agent, restore_game, clear_checkpoints
 
 MAX_MEMORY = 100_000
 BATCH_SIZE = 1000
+REPLAY_CHUNK = 64 # samples per summed-gradient step of train_long_memory (1: the old per-sample loop)
 LR = 0.001
+GAMMA = 0.9
+HIDDEN_SIZES = [256]
+EPSILON_GAMES = 80 # exploration decays linearly to zero over this many games
+OPTIMIZER = 'sgd' # 'sgd', 'momentum', 'rmsprop' or 'adam' (see optimizers.py)
+GRAD_CLIP = None # e.g. 10.0: clip the global gradient norm before each update
+
+GRID_CELLS = (32, 24) # (cols, rows) of the board; large boards such as (200, 200) are meant for HEADLESS runs
+OBSERVATION = 'basic' # 'basic' (11 binary features) or 'rich' (adds 8 rays and a local window, see observation.py)
+WINDOW = 7 # side of the local occupancy window of the 'rich' observation
 
 # Training Control
 RESUME = True
+HEADLESS = False # True: no window, no frame cap (servers without a display)
+PRIORITIZED = False # True: prioritized experience replay (sum-tree) instead of uniform sampling
+LOG_FORMAT = 'csv' # 'csv', 'npy' (binary int16 segments, see logger.py) or 'store' (indexed, memory-mapped, see store.py)
+LOG_POSITIONS = True # per-frame position rows (used by the dashboard heatmap)
+RECORD_EPISODES = True # seed + 2-bit actions per game; replay with episodes.py
+PLOT_MODE = 'process' # 'process', 'inline' or 'off' (see helper.py)
+PROFILE = False # True: per-phase timers and throughput summaries (see profiler.py)
+PROFILE_SUMMARY_SECONDS = 30
+PROFILE_CAPTURE = None # None, 'cprofile' or 'sample': profile a window of PROFILE_CAPTURE_GAMES games
+PROFILE_CAPTURE_AFTER = 10
+PROFILE_CAPTURE_GAMES = 10
+METRICS_PORT = None # e.g. 8765: serve the latest profile summary as JSON on localhost
+POLICY_CACHE_REFRESH = 0 # >0: pick greedy actions from a 2048-entry Q-table rebuilt every N weight updates
+PIPELINED = False # True: train on a learner thread while the game plays with a weight snapshot (see pipeline.py)
+PIPELINE_SYNC_EVERY = 10 # learner updates between weight snapshots for the actor
+PIPELINE_STEPS_PER_UPDATE = 10 # game steps per learner batch (0: no limit)
+CHECKPOINT_EVERY = 50 # games between full checkpoints (also taken on every new record and on exit)
+CHECKPOINT_KEEP = 3 # newest checkpoints kept in data/checkpoints
 
 class Agent:
-    def __init__(self):
+    # seed: replay sampling seed (default: drawn from the global NumPy RNG)
+    def __init__(self, seed=None):
+        self.seed = seed
         self.n_games = 0
         self.epsilon = 0 
-        self.gamma = 0.9 
-        self.memory = deque(maxlen=MAX_MEMORY)
-        self.model = ManualModel(11, [256], 3, LR)
+        self.gamma = GAMMA
+        self.record = 0
+        self.total_score = 0
+        self.checkpoint = None # loaded checkpoint; train() restores the game and RNGs from it
+        # Input size follows the observation
+        self.n_features = observation_size(OBSERVATION, WINDOW)
+        self._build_learning_state()
         
         # Ensure data directory exists
         if not os.path.exists('./data'):
             os.makedirs('./data')
 
         if RESUME:
-            if self.model.load('model_weights.npz'):
+            self.checkpoint = self._restore_checkpoint()
+            if self.checkpoint is not None:
+                print(f"Resumed from {self.checkpoint['path']} at game {self.n_games} (record {self.record})")
+            elif self.model.load('model_weights.npz'):
+                # Older runs only have weights and replay memory
                 print("Resumed from data/model_weights.npz")
-                 # Optional: Logic to determine n_games from logs could be added here
-                 # but for now we just load weights.
+                self._check_input_size(self.model.layers[0].shape[0])
+                self.memory.load('replay_memory.npz')
             else:
                 print("Could not load model, starting fresh.")
         else:
              # If not resuming, maybe clear old logs? 
              # User said: "initialize a fresh model... and start new log files (overwrite old ones)"
-             if os.path.exists('./data/training_log.csv'):
-                 os.remove('./data/training_log.csv')
-             if os.path.exists('./data/positions_log.csv'):
-                 os.remove('./data/positions_log.csv')
+             clear_logs('./data')
+             clear_checkpoints('./data/checkpoints')
+             clear_recordings('./data')
              print("Starting fresh. Old logs removed.")
 
-    def get_state(self, game):
+    def _build_learning_state(self):
+        # Fresh replay memory and model (again after a failed restore)
+        if PRIORITIZED:
+            self.memory = PrioritizedReplayBuffer(MAX_MEMORY, self.n_features, seed=self.seed,
+                                                  state_dtype=state_dtype(OBSERVATION))
+        else:
+            self.memory = ReplayBuffer(MAX_MEMORY, self.n_features, seed=self.seed, state_dtype=state_dtype(OBSERVATION))
+        self.model = ManualModel(self.n_features, HIDDEN_SIZES, 3, LR, optimizer=OPTIMIZER, clip_norm=GRAD_CLIP)
+        self.actor_model = self.model # picks the actions; a weight snapshot when PIPELINED
+        self.policy = None
+        if POLICY_CACHE_REFRESH > 0 and OBSERVATION == 'basic':
+            self.policy = PolicyCache(self.model, self.n_features, POLICY_CACHE_REFRESH)
+        elif POLICY_CACHE_REFRESH > 0:
+            print("POLICY_CACHE_REFRESH needs the 'basic' observation; predicting directly.")
+
+    def _restore_checkpoint(self):
+        # Newest checkpoint that restores cleanly. Each candidate is also restored
+        # onto a scratch board, so a checkpoint that would fail in train() is
+        # skipped here; a failed attempt rebuilds the model and memory before the
+        # next older checkpoint is tried. A different observation or board size
+        # is a settings mismatch rather than a damaged file and is raised.
+        for ckpt in load_checkpoints('./data/checkpoints'):
+            self._check_input_size(ckpt['model/W1'].shape[0])
+            check_board(ckpt, GRID_CELLS[0] * GRID_CELLS[1])
+            try:
+                restore_agent(self, ckpt)
+                restore_game(SnakeGameAI(GRID_CELLS[0] * BLOCK_SIZE, GRID_CELLS[1] * BLOCK_SIZE, headless=True), ckpt)
+                return ckpt
+            except Exception as e:
+                print(f"Could not restore checkpoint {ckpt['path']}: {e}; trying an older one")
+                self.n_games = 0
+                self.record = 0
+                self.total_score = 0
+                self._build_learning_state()
+        return None
+
+    def _check_input_size(self, n_inputs):
+        if n_inputs != self.n_features:
+            raise ValueError(f"Saved model takes {n_inputs} inputs but OBSERVATION='{OBSERVATION}' gives "
+                             f"{self.n_features}; set RESUME = False to start a fresh run")
+
+    @staticmethod
+    def get_state(game):
         head = game.snake[0]
         point_l = Point(head.x - 20, head.y)
         point_r = Point(head.x + 20, head.y)
@@ -85,120 +172,213 @@ class Agent:
             game.food.y < game.head.y, 
             game.food.y > game.head.y
         ]
+        if OBSERVATION == 'rich':
+            return np.concatenate([np.array(state, dtype=np.float32), game_rich_features(game, WINDOW)])
         return np.array(state, dtype=int)
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.push(state, action, reward, next_state, done)
 
     def train_long_memory(self):
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)
+        # Batched forward/backward passes over REPLAY_CHUNK samples at a time
+        # instead of a Python loop per sample. Each pass sums the per-sample
+        # gradients, so the replay still moves the weights by one lr step per
+        # sample like that loop did; one mean step over the whole batch is
+        # BATCH_SIZE times weaker and does not learn.
+        if PRIORITIZED:
+            states, actions, rewards, next_states, dones, idx, weights = self.memory.sample(BATCH_SIZE)
         else:
-            mini_sample = self.memory
-
-        for state, action, reward, next_state, done in mini_sample:
-            self.train_short_memory(state, action, reward, next_state, done)
+            states, actions, rewards, next_states, dones = self.memory.sample(BATCH_SIZE)
+            weights = None
+        td_errors = np.empty(len(states))
+        for i in range(0, len(states), REPLAY_CHUNK):
+            part = slice(i, i + REPLAY_CHUNK)
+            self.model.train_batch(states[part], actions[part], rewards[part], next_states[part], dones[part],
+                                   self.gamma, None if weights is None else weights[part], reduction='sum')
+            td_errors[part] = self.model.td_errors
+        if PRIORITIZED:
+            self.memory.update_priorities(idx, td_errors)
 
     def train_short_memory(self, state, action, reward, next_state, done):
-        target = self.model.forward(state)
-        target = target.copy()
-        Q_new = reward
-        if not done:
-            Q_new = reward + self.gamma * np.max(self.model.forward(next_state))
-        target[0][np.argmax(action)] = Q_new
-        self.model.train_step(state, target)
+        self.model.train_batch(state.reshape(1, -1), np.array([action]), np.array([reward]),
+                               next_state.reshape(1, -1), np.array([done]), self.gamma)
 
     def get_action(self, state):
-        self.epsilon = 80 - self.n_games
+        self.epsilon = EPSILON_GAMES - self.n_games
         final_move = [0,0,0]
         if random.randint(0, 200) < self.epsilon:
             move = random.randint(0, 2)
             final_move[move] = 1
+        elif self.policy is not None:
+            move = self.policy.best_action(state)
+            final_move[move] = 1
         else:
-            prediction = self.model.forward(state)
+            prediction = self.actor_model.predict(state)
             move = np.argmax(prediction)
             final_move[move] = 1
         return final_move
 
-def train():
-    plot_scores = []
-    plot_mean_scores = []
-    total_score = 0
-    record = 0
-    agent = Agent()
-    game = SnakeGameAI()
-    
-    # Init Logs
-    log_dir = './data'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    train_log_path = os.path.join(log_dir, 'training_log.csv')
-    pos_log_path = os.path.join(log_dir, 'positions_log.csv')
-
-    # If initializing fresh logs (RESUME=False handled in __init__ remove), assume need headers
-    if not os.path.exists(train_log_path):
-        with open(train_log_path, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Game_No', 'Score', 'Record', 'Avg_Steps', 'Death_Reason'])
+# Set by Ctrl+C during train(); the loop checks it between steps, so training
+# always stops at a consistent point for the exit checkpoint and recording.
+# A second Ctrl+C interrupts immediately.
+_stop_requested = threading.Event()
+
+def _request_stop(signum, frame):
+    _stop_requested.set()
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    print("Stopping after the current step (Ctrl+C again to abort)...")
+
+def train(headless=HEADLESS, max_games=None, on_game=None, seed=None):
+    # Trains until interrupted, or for max_games games; returns the number of steps played.
+    # on_game(n_games, score, record) is called after every game; returning True stops training.
+    # seed: replay sampling seed (see Agent)
+    agent = Agent(seed)
+    game = SnakeGameAI(GRID_CELLS[0] * BLOCK_SIZE, GRID_CELLS[1] * BLOCK_SIZE, headless=headless)
+    checkpointer = Checkpointer('./data/checkpoints', CHECKPOINT_KEEP)
+    recorder = EpisodeRecorder('./data', game.w, game.h) if RECORD_EPISODES else None
+    if agent.checkpoint is not None:
+        restore_game(game, agent.checkpoint, recorder)
+        agent.checkpoint = None
+        # Games the previous run logged after this checkpoint are played again
+        if truncate_logs('./data', agent.n_games, game.frame_iteration):
+            print(f"Removed the games logged after game {agent.n_games} (played again from the checkpoint)")
     
-    if not os.path.exists(pos_log_path):
-        with open(pos_log_path, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Game_No', 'X', 'Y'])
+    # Init Logs (buffered; flushed in bulk and on shutdown)
+    logger = TrainingLogger('./data', fmt=LOG_FORMAT, board_size=(game.w, game.h))
+    plotter = ProgressPlotter(PLOT_MODE)
+    if PROFILE:
+        profiler = TrainingProfiler(PROFILE_SUMMARY_SECONDS, './data/profile_log.jsonl', METRICS_PORT,
+                                    PROFILE_CAPTURE, PROFILE_CAPTURE_AFTER, PROFILE_CAPTURE_GAMES)
+    else:
+        profiler = NullProfiler()
+
+    learner = None
+    if PIPELINED:
+        learner = LearnerThread(agent, BATCH_SIZE, PIPELINE_SYNC_EVERY, PIPELINE_STEPS_PER_UPDATE)
+        agent.actor_model = learner.actor_model
+        if agent.policy is not None:
+            agent.policy.model = agent.actor_model
+            agent.policy.invalidate()
+        learner.start()
+
+    _stop_requested.clear()
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGINT, _request_stop)
+    try:
+        return _train_loop(agent, game, logger, plotter, profiler, checkpointer, recorder, max_games, on_game,
+                           learner)
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
+        if learner is not None:
+            learner.stop()
+        # Final checkpoint wherever training stopped; written before exiting
+        checkpointer.save(agent, game, recorder, export_weights=True)
+        checkpointer.close()
+        logger.close()
+        if recorder is not None:
+            recorder.close()
+        plotter.close()
+        profiler.close()
 
-    # Accumulators for steps in current game
-    current_game_steps = 0
+def _train_loop(agent, game, logger, plotter, profiler, checkpointer, recorder=None, max_games=None, on_game=None,
+                learner=None):
+    # With a learner (PIPELINED) this loop is only the actor: transitions go to
+    # the learner thread and both training calls are skipped here.
+    # Accumulators for steps in current game (a resumed game may be under way)
+    current_game_steps = game.frame_iteration
+    total_steps = 0
+    learner_updates = agent.model.n_updates # profiler counts the learner's updates from here
 
-    while True:
+    while (max_games is None or agent.n_games < max_games) and not _stop_requested.is_set():
+        profiler.begin()
+        if learner is not None:
+            learner.sync(agent.actor_model)
         state_old = agent.get_state(game)
+        profiler.lap('state')
         final_move = agent.get_action(state_old)
+        profiler.lap('action')
         
         # Move
         reward, done, score, steps_per_food, death_reason = game.play_step(final_move, agent.n_games)
+        profiler.lap('play_step')
         state_new = agent.get_state(game)
+        profiler.lap('state')
 
         # Train Check
-        agent.train_short_memory(state_old, final_move, reward, state_new, done)
-        agent.remember(state_old, final_move, reward, state_new, done)
+        if learner is None:
+            agent.train_short_memory(state_old, final_move, reward, state_new, done)
+            profiler.update()
+            profiler.lap('train_short')
+            agent.remember(state_old, final_move, reward, state_new, done)
+        else:
+            learner.remember(state_old, final_move, reward, state_new, done)
+            n_updates = agent.model.n_updates
+            profiler.update(n_updates - learner_updates)
+            learner_updates = n_updates
+        profiler.lap('remember')
 
-        # Log Position
-        with open(pos_log_path, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([agent.n_games, game.head.x, game.head.y])
+        # Log Position (numbered like the episode record the game will get)
+        if LOG_POSITIONS:
+            logger.log_position(agent.n_games + 1, game.head.x, game.head.y)
+        if recorder is not None:
+            recorder.record_step(final_move)
+        profiler.lap('log')
             
         current_game_steps += 1
+        total_steps += 1
+        profiler.step()
 
         if done:
             # Train Long
+            episode_seed = game.episode_seed
             game.reset()
             agent.n_games += 1
-            agent.train_long_memory()
+            if learner is None:
+                agent.train_long_memory()
+                profiler.update()
+            profiler.lap('train_long')
 
-            if score > record:
-                record = score
-                agent.model.save()
+            agent.total_score += score
+            new_record = score > agent.record
+            if new_record:
+                agent.record = score
+            # Before the checkpoint, which saves the new game's actions (none yet)
+            if recorder is not None:
+                recorder.end_episode(agent.n_games, episode_seed, score, death_reason)
+            if new_record or agent.n_games % CHECKPOINT_EVERY == 0:
+                # Snapshot only; the checkpointer thread does the writing
+                if learner is None:
+                    checkpointer.save(agent, game, recorder, export_weights=new_record)
+                else:
+                    with learner.paused():
+                        checkpointer.save(agent, game, recorder, export_weights=new_record)
+            profiler.lap('save')
 
-            print(f'Game: {agent.n_games}, Score: {score}, Record: {record}, Reason: {death_reason}')
+            print(f'Game: {agent.n_games}, Score: {score}, Record: {agent.record}, Reason: {death_reason}')
             
             # Log Training
             # Avg_Steps: Total steps in game / (Score + 1) roughly or just Total Steps? User asked "Avg_Steps".
             # Usually means "Steps per Point" or "Total Steps". Let's log Total Steps / (Score+1) as efficiency metric.
             avg_steps = current_game_steps / (score + 1)
             
-            with open(train_log_path, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([agent.n_games, score, record, f'{avg_steps:.2f}', death_reason])
+            logger.log_episode(agent.n_games, score, agent.record, avg_steps, death_reason)
+            profiler.lap('log')
 
             # Reset
             current_game_steps = 0
             
-            # Plot
-            plot_scores.append(score)
-            total_score += score
-            mean_score = total_score / agent.n_games
-            plot_mean_scores.append(mean_score)
-            plot(plot_scores, plot_mean_scores)
+            # Plot (non-blocking)
+            mean_score = agent.total_score / agent.n_games
+            plotter.add(score, mean_score)
+            profiler.lap('plot')
+            profiler.game_done()
+
+            if on_game is not None and on_game(agent.n_games, score, agent.record):
+                break
+
+    return total_steps
 
 if __name__ == '__main__':
     train()
\ No newline at end of file
@@ -0,0 +1,200 @@
+import io
+import os
+import glob
+import numpy as np
+import pandas as pd
+from logger import EPISODE_DTYPE, EPISODE_HEADER, POSITION_DTYPE, POSITION_HEADER
+from vec_env import DEATH_REASONS
+
+HEATMAP_BINS = (32, 24) # (x bins, y bins), same as the dashboard's hist2d
+
+class IncrementalStats:
+    # Running aggregates over the training logs: a fixed 32x24 visit heatmap,
+    # the per-game score/record table and death-reason counts.
+    # update() only reads what was appended since the last call (byte offsets
+    # for the CSV logs, segment numbers for the npy logs, record counts for the
+    # store) in chunk_bytes pieces,
+    # so memory stays constant no matter how large positions_log.csv grows.
+    # save()/load() persist the aggregates together with those offsets.
+    # w, h: board size in pixels the positions were logged on (logger.load_board_size).
+    def __init__(self, log_dir='./data', w=640, h=480, state_file='analytics_state.npz',
+                 chunk_bytes=16 * 1024 * 1024):
+        self.log_dir = log_dir
+        self.w = w
+        self.h = h
+        self.state_path = os.path.join(log_dir, state_file)
+        self.chunk_bytes = chunk_bytes
+        self.pos_path = os.path.join(log_dir, 'positions_log.csv')
+        self.train_path = os.path.join(log_dir, 'training_log.csv')
+        self.reset()
+        self.load()
+
+    def reset(self):
+        self.heatmap = np.zeros(HEATMAP_BINS, dtype=np.int64)
+        self.episodes = np.zeros(0, dtype=EPISODE_DTYPE)
+        self.death_counts = np.zeros(len(DEATH_REASONS), dtype=np.int64)
+        self.pos_offset = 0
+        self.train_offset = 0
+        self.pos_segment = 0
+        self.episode_segment = 0
+        self.store_segment = 0 # positions segment of the store being read
+        self.store_positions = 0 # records already read from that segment
+        self.store_episodes = 0
+
+    def update(self):
+        # Fold in new log data; returns the number of new position rows
+        if self._logs_were_cleared():
+            self.reset()
+
+        n_new = 0
+        if os.path.exists(self.pos_path):
+            self.pos_offset, n = self._read_csv(self.pos_path, self.pos_offset, POSITION_HEADER,
+                                                self._add_positions_frame)
+            n_new += n
+        if os.path.exists(self.train_path):
+            self.train_offset, _ = self._read_csv(self.train_path, self.train_offset, EPISODE_HEADER,
+                                                  self._add_episodes_frame)
+
+        for path in self._segments('positions')[self.pos_segment:]:
+            positions = np.load(path)
+            self._add_positions(positions['X'], positions['Y'])
+            n_new += len(positions)
+            self.pos_segment += 1
+        for path in self._segments('episodes')[self.episode_segment:]:
+            self._add_episodes(np.load(path))
+            self.episode_segment += 1
+
+        n_new += self._read_store()
+        return n_new
+
+    def _store_path(self, name):
+        return os.path.join(self.log_dir, 'store', name)
+
+    def _store_records(self, name, dtype):
+        path = self._store_path(name)
+        return os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+
+    def _read_store(self):
+        # Positions segment by segment from the last record read; a segment is
+        # left behind once a later one exists (the writer never goes back)
+        n_new = 0
+        chunk = max(1, self.chunk_bytes // POSITION_DTYPE.itemsize)
+        while True:
+            name = f'positions_{self.store_segment:06d}.bin'
+            n = self._store_records(name, POSITION_DTYPE)
+            if n > self.store_positions:
+                positions = np.memmap(self._store_path(name), dtype=POSITION_DTYPE, mode='r', shape=(n,))
+                for start in range(self.store_positions, n, chunk):
+                    part = positions[start:start + chunk]
+                    self._add_positions(part['X'], part['Y'])
+                n_new += n - self.store_positions
+                self.store_positions = n
+                del positions
+            if not os.path.exists(self._store_path(f'positions_{self.store_segment + 1:06d}.bin')):
+                break
+            self.store_segment += 1
+            self.store_positions = 0
+
+        n = self._store_records('episodes.bin', EPISODE_DTYPE)
+        if n > self.store_episodes:
+            episodes = np.memmap(self._store_path('episodes.bin'), dtype=EPISODE_DTYPE, mode='r', shape=(n,))
+            self._add_episodes(np.array(episodes[self.store_episodes:]))
+            self.store_episodes = n
+        return n_new
+
+    def _segments(self, kind):
+        return sorted(glob.glob(os.path.join(self.log_dir, kind, '*.npy')))
+
+    def _logs_were_cleared(self):
+        # A fresh run (RESUME=False) deletes the logs; start over when files shrank
+        for path, offset in ((self.pos_path, self.pos_offset), (self.train_path, self.train_offset)):
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size < offset:
+                return True
+        return (len(self._segments('positions')) < self.pos_segment
+                or len(self._segments('episodes')) < self.episode_segment
+                or (self.store_segment > 0 and not os.path.exists(self._store_path(f'positions_{self.store_segment:06d}.bin')))
+                or self._store_records(f'positions_{self.store_segment:06d}.bin', POSITION_DTYPE) < self.store_positions
+                or self._store_records('episodes.bin', EPISODE_DTYPE) < self.store_episodes)
+
+    def _read_csv(self, path, offset, header, consume):
+        # Parse complete lines from offset onwards, one chunk at a time, and
+        # return the offset just past the last complete line. A trailing
+        # partial line (writer mid-flush) is left for the next update.
+        n_rows = 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            if offset == 0:
+                offset += len(f.readline())
+            while True:
+                block = f.read(self.chunk_bytes)
+                end = block.rfind(b'\n')
+                if end < 0:
+                    break
+                offset += end + 1
+                f.seek(offset)
+                df = pd.read_csv(io.BytesIO(block[:end + 1]), header=None, names=header)
+                consume(df)
+                n_rows += len(df)
+        return offset, n_rows
+
+    def _add_positions_frame(self, df):
+        self._add_positions(df['X'].to_numpy(), df['Y'].to_numpy())
+
+    def _add_positions(self, xs, ys):
+        # Off-board points (the head position after a wall collision) are skipped
+        bx = np.floor(np.asarray(xs, dtype=float) * HEATMAP_BINS[0] / self.w).astype(np.int64)
+        by = np.floor(np.asarray(ys, dtype=float) * HEATMAP_BINS[1] / self.h).astype(np.int64)
+        inside = (bx >= 0) & (bx < HEATMAP_BINS[0]) & (by >= 0) & (by < HEATMAP_BINS[1])
+        flat = bx[inside] * HEATMAP_BINS[1] + by[inside]
+        self.heatmap += np.bincount(flat, minlength=self.heatmap.size).reshape(HEATMAP_BINS)
+
+    def _add_episodes_frame(self, df):
+        episodes = np.zeros(len(df), dtype=EPISODE_DTYPE)
+        for name in ('Game_No', 'Score', 'Record', 'Avg_Steps'):
+            episodes[name] = df[name].to_numpy()
+        episodes['Death_Reason'] = [DEATH_REASONS.index(r) if r in DEATH_REASONS else 0
+                                    for r in df['Death_Reason']]
+        self._add_episodes(episodes)
+
+    def _add_episodes(self, episodes):
+        self.episodes = np.concatenate([self.episodes, episodes])
+        self.death_counts += np.bincount(episodes['Death_Reason'], minlength=len(DEATH_REASONS))
+
+    def episodes_frame(self):
+        # Per-game table in the same shape as pd.read_csv('training_log.csv')
+        df = pd.DataFrame({name: self.episodes[name] for name in EPISODE_HEADER})
+        df['Death_Reason'] = [DEATH_REASONS[code] for code in self.episodes['Death_Reason']]
+        return df
+
+    def death_reason_counts(self):
+        return pd.Series({DEATH_REASONS[code]: int(n) for code, n in enumerate(self.death_counts)
+                          if code > 0 and n > 0}).sort_values(ascending=False)
+
+    def save(self):
+        np.savez(self.state_path, heatmap=self.heatmap, episodes=self.episodes,
+                 death_counts=self.death_counts,
+                 offsets=np.array([self.pos_offset, self.train_offset,
+                                   self.pos_segment, self.episode_segment,
+                                   self.store_segment, self.store_positions, self.store_episodes]))
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return False
+        try:
+            data = np.load(self.state_path)
+            if data['heatmap'].shape != HEATMAP_BINS:
+                return False
+            self.heatmap = data['heatmap']
+            self.episodes = data['episodes']
+            self.death_counts = data['death_counts']
+            # State files written before the store existed hold four offsets
+            offsets = np.zeros(7, dtype=np.int64)
+            offsets[:len(data['offsets'])] = data['offsets']
+            (self.pos_offset, self.train_offset, self.pos_segment, self.episode_segment,
+             self.store_segment, self.store_positions, self.store_episodes) = (int(v) for v in offsets)
+            return True
+        except Exception as e:
+            print(f"Error loading analytics state: {e}")
+            self.reset()
+            return False
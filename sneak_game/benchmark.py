@@ -0,0 +1,219 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import subprocess
+import contextlib
+import numpy as np
+from game import SnakeGameAI, Direction, Point, BLOCK_SIZE
+from model import ManualModel
+from replay import ReplayBuffer, PrioritizedReplayBuffer
+from vec_env import VecSnakeGame
+from observation import game_rich_features
+
+# Benchmark Control
+SEED = 0
+QUICK = False # True: fewer iterations for a fast smoke run (numbers are noisier)
+OUTPUT = './data/benchmark_results.jsonl' # one JSON line per run, appended
+SNAKE_LENGTHS = [3, 50, 200, 600]
+BATCH_SIZES = [1, 32, 256, 1000]
+HIDDEN_CONFIGS = [[256], [128, 128], [512]]
+TRAIN_GAMES = 20
+
+def _seed():
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+def _measure(fn, n_iter, warmup=None, repeat=3):
+    # Seconds per call of fn: warm-up first, then the median of `repeat` timed runs
+    for _ in range(warmup if warmup is not None else max(1, n_iter // 10)):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(n_iter):
+            fn()
+        times.append((time.perf_counter() - start) / n_iter)
+    return float(np.median(times))
+
+def _iters(n):
+    return max(1, n // 20) if QUICK else n
+
+def hamiltonian_cycle(cols, rows):
+    # Cell cycle covering the whole board (rows must be even): snake along
+    # columns 1..cols-1 row by row, then return up column 0
+    cells = []
+    for y in range(rows):
+        xs = range(1, cols) if y % 2 == 0 else range(cols - 1, 0, -1)
+        cells.extend((x, y) for x in xs)
+    cells.extend((0, y) for y in range(rows - 1, -1, -1))
+    return cells
+
+def _direction(a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    return {(1, 0): Direction.RIGHT, (-1, 0): Direction.LEFT,
+            (0, 1): Direction.DOWN, (0, -1): Direction.UP}[(dx, dy)]
+
+class CycleRunner:
+    # A snake of fixed length that follows a Hamiltonian cycle forever, so
+    # play_step can be timed at any length without the game ending. Food is
+    # kept off the board so the length never changes.
+    def __init__(self, length):
+        self.game = SnakeGameAI(headless=True)
+        self.cycle = hamiltonian_cycle(self.game.cols, self.game.rows)
+        n = len(self.cycle)
+        body = [Point(float(x * BLOCK_SIZE), float(y * BLOCK_SIZE))
+                for x, y in reversed(self.cycle[:length])]
+        self.game.set_snake(body, _direction(self.cycle[length - 2], self.cycle[length - 1]))
+        self.game.food = Point(-BLOCK_SIZE, -BLOCK_SIZE)
+
+        # Relative action for every step around the cycle
+        clock_wise = [Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP]
+        self.actions = []
+        for k in range(n):
+            cur = _direction(self.cycle[(length - 2 + k) % n], self.cycle[(length - 1 + k) % n])
+            nxt = _direction(self.cycle[(length - 1 + k) % n], self.cycle[(length + k) % n])
+            turn = (clock_wise.index(nxt) - clock_wise.index(cur)) % 4
+            self.actions.append({0: [1, 0, 0], 1: [0, 1, 0], 3: [0, 0, 1]}[turn])
+        self.k = 0
+
+    def step(self):
+        self.game.play_step(self.actions[self.k])
+        self.game.frame_iteration = 0 # never time out
+        self.k = (self.k + 1) % len(self.actions)
+
+def bench_env():
+    from agent import Agent
+    results = {}
+    for length in SNAKE_LENGTHS:
+        _seed()
+        runner = CycleRunner(length)
+        t_step = _measure(runner.step, _iters(20_000))
+        t_state = _measure(lambda: Agent.get_state(runner.game), _iters(20_000))
+        t_rich = _measure(lambda: game_rich_features(runner.game), _iters(5_000))
+        results[f'len_{length}'] = {'play_step_per_s': 1 / t_step, 'get_state_us': t_state * 1e6,
+                                    'rich_features_us': t_rich * 1e6}
+        print(f"  length {length:4d}: play_step {1 / t_step:10.0f}/s, get_state {t_state * 1e6:6.2f} us, "
+              f"rich features +{t_rich * 1e6:6.2f} us")
+    return results
+
+def bench_vec_env(n_games=(64, 1024)):
+    results = {}
+    for n in n_games:
+        env = VecSnakeGame(n, seed=SEED)
+        rng = np.random.default_rng(SEED)
+        actions = np.eye(3, dtype=np.int8)[rng.integers(0, 3, size=(64, n))]
+        k = [0]
+        def step():
+            env.get_states()
+            env.step(actions[k[0] % 64])
+            k[0] += 1
+        t = _measure(step, _iters(500))
+        results[f'n_{n}'] = {'env_steps_per_s': n / t}
+        print(f"  {n:5d} games: {n / t:12.0f} env-steps/s")
+    return results
+
+def bench_model():
+    results = {}
+    for hidden in HIDDEN_CONFIGS:
+        for batch in BATCH_SIZES:
+            _seed()
+            model = ManualModel(11, hidden, 3)
+            states = np.random.randint(0, 2, size=(batch, 11)).astype(np.uint8)
+            actions = np.random.randint(0, 3, size=batch)
+            rewards = np.random.choice([-10.0, 0.0, 10.0], size=batch)
+            dones = np.random.rand(batch) < 0.05
+            n = _iters(max(20, 20_000 // batch))
+            t_fwd = _measure(lambda: model.forward(states), n)
+            t_pred = _measure(lambda: model.predict(states), n)
+            t_train = _measure(lambda: model.train_batch(states, actions, rewards, states, dones), n)
+            key = f"h{'x'.join(map(str, hidden))}_b{batch}"
+            results[key] = {'forward_samples_per_s': batch / t_fwd,
+                            'predict_samples_per_s': batch / t_pred,
+                            'train_batch_samples_per_s': batch / t_train,
+                            'train_batch_ms': t_train * 1e3}
+            print(f"  hidden {str(hidden):11s} batch {batch:5d}: forward {batch / t_fwd:10.0f}/s, "
+                  f"predict {batch / t_pred:10.0f}/s, train {batch / t_train:10.0f}/s")
+    return results
+
+def bench_replay(capacity=100_000, batch=1000):
+    results = {}
+    for name, cls in (('uniform', ReplayBuffer), ('prioritized', PrioritizedReplayBuffer)):
+        buf = cls(capacity, 11, seed=SEED)
+        rng = np.random.default_rng(SEED)
+        buf.push_batch(rng.integers(0, 2, size=(capacity, 11)), rng.integers(0, 3, size=capacity),
+                       rng.normal(size=capacity), rng.integers(0, 2, size=(capacity, 11)),
+                       rng.random(capacity) < 0.05)
+        state = np.zeros(11, dtype=np.uint8)
+        t_sample = _measure(lambda: buf.sample(batch), _iters(500))
+        t_push = _measure(lambda: buf.push(state, 1, 0.0, state, False), _iters(20_000))
+        results[name] = {'sample_ms': t_sample * 1e3, 'push_us': t_push * 1e6}
+        print(f"  {name:11s}: sample({batch}) {t_sample * 1e3:6.3f} ms, push {t_push * 1e6:6.2f} us")
+    return results
+
+def bench_train(n_games=TRAIN_GAMES):
+    # End-to-end headless train() in a scratch directory, with plotting off.
+    # random, np.random and the replay sampling are seeded, so every run plays
+    # the same games; the step count is reported to check that.
+    import agent
+    saved = (agent.RESUME, agent.PLOT_MODE)
+    agent.RESUME, agent.PLOT_MODE = False, 'off'
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            _seed()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                steps = agent.train(headless=True, max_games=max(2, n_games // 4) if QUICK else n_games, seed=SEED)
+                elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        agent.RESUME, agent.PLOT_MODE = saved
+    print(f"  train(): {steps / elapsed:10.0f} steps/s over {steps} steps")
+    return {'steps_per_s': steps / elapsed, 'steps': steps}
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def run_benchmarks(output=OUTPUT):
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'seed': SEED,
+        'quick': QUICK,
+    }
+    print("Environment (SnakeGameAI):")
+    record['env'] = bench_env()
+    print("Batched environment (VecSnakeGame):")
+    record['vec_env'] = bench_vec_env()
+    print("Model (ManualModel):")
+    record['model'] = bench_model()
+    print("Replay memory:")
+    record['replay'] = bench_replay()
+    print("End-to-end training:")
+    record['train'] = bench_train()
+
+    folder = os.path.dirname(output)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(output, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"Results appended to {output}")
+    return record
+
+if __name__ == '__main__':
+    if '--quick' in sys.argv:
+        QUICK = True
+    run_benchmarks()
@@ -0,0 +1,200 @@
+import os
+import glob
+import json
+import random
+import shutil
+import threading
+import numpy as np
+from game import Direction, Point
+
+# A checkpoint is one .npz file holding everything train() needs to continue
+# exactly where it stopped:
+#   model/*   weights and optimizer state (ManualModel.state_dict)
+#   memory/*  replay memory, oldest first (ReplayBuffer.state_dict)
+#   meta      JSON: n_games, record, total_score, the game position (including
+#             the free-cell order that food placement draws from), the actions
+#             recorded so far in the running game and the state of every
+#             random number generator
+# train() checkpoints between games and once more on exit, wherever it stopped.
+
+class Checkpointer:
+    # Snapshots are copied on the training thread (a few MB of memcpy) and
+    # written by a background thread, so the step loop never waits for disk.
+    # Files are written to a temporary name and renamed into place, so a crash
+    # mid-write never leaves a truncated checkpoint; only the newest `keep`
+    # are kept. If a snapshot arrives while the previous one is still being
+    # written, the pending one is replaced by the newer snapshot.
+    def __init__(self, folder='./data/checkpoints', keep=3):
+        self.folder = folder
+        self.keep = keep
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, agent, game, recorder=None, export_weights=False):
+        # export_weights: also write data/model_weights.npz (used by the other tools)
+        snapshot = capture_state(agent, game, recorder)
+        with self._cond:
+            if self._pending is not None:
+                export_weights = export_weights or self._pending[1]
+            self._pending = (snapshot, export_weights)
+            self._cond.notify_all()
+
+    def wait(self):
+        # Block until every submitted snapshot is on disk
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        self.wait()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                (snapshot, export_weights), self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(snapshot, export_weights)
+            except Exception as e:
+                print(f"Error writing checkpoint: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, snapshot, export_weights):
+        n_games = json.loads(str(snapshot['meta']))['n_games']
+        _savez_atomic(os.path.join(self.folder, f'checkpoint_{n_games:07d}.npz'), snapshot)
+        if export_weights:
+            model = {key[len('model/'):]: arr for key, arr in snapshot.items() if key.startswith('model/')}
+            _savez_atomic(os.path.join(os.path.dirname(self.folder), 'model_weights.npz'), model)
+        for path in list_checkpoints(self.folder)[:-self.keep]:
+            os.remove(path)
+
+def _savez_atomic(path, arrays):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _rng_state(rng):
+    version, internal, gauss_next = rng.getstate()
+    return [version, list(internal), gauss_next]
+
+def _set_rng_state(rng, state):
+    version, internal, gauss_next = state
+    rng.setstate((version, tuple(internal), gauss_next))
+
+def capture_state(agent, game, recorder=None):
+    # Copies of everything in a checkpoint, taken on the calling thread
+    snapshot = {f'model/{key}': np.array(arr) for key, arr in agent.model.state_dict().items()}
+    snapshot.update({f'memory/{key}': arr for key, arr in agent.memory.state_dict().items()})
+
+    np_state = np.random.get_state()
+    meta = {
+        'n_games': agent.n_games,
+        'record': agent.record,
+        'total_score': agent.total_score,
+        'game': {'snake': [list(pt) for pt in game.snake], 'direction': game.direction.name,
+                 'food': list(game.food), 'score': game.score, 'frame_iteration': game.frame_iteration,
+                 'steps_per_food': game.steps_per_food, 'free_cells': list(game.free_cells),
+                 'n_free': game.n_free, 'episode_seed': game.episode_seed,
+                 'seed_rng': _rng_state(game.seed_rng), 'food_rng': _rng_state(game.food_rng)},
+        'episode_actions': list(recorder.actions) if recorder is not None else [],
+        'random': _rng_state(random),
+        'np_random': [np_state[0], np_state[1].tolist(), np_state[2], np_state[3], np_state[4]],
+        'memory_rng': agent.memory.rng.bit_generator.state,
+    }
+    snapshot['meta'] = np.array(json.dumps(meta))
+    return snapshot
+
+def list_checkpoints(folder='./data/checkpoints'):
+    # Oldest first; the zero-padded game number makes name order chronological
+    return sorted(glob.glob(os.path.join(folder, 'checkpoint_*.npz')))
+
+def load_checkpoints(folder='./data/checkpoints'):
+    # Readable checkpoints as dicts (meta decoded), newest first, loaded one at
+    # a time so a caller can fall back to an older one if restoring fails
+    for path in reversed(list_checkpoints(folder)):
+        try:
+            with np.load(path) as data:
+                ckpt = {key: data[key] for key in data.files}
+            ckpt['meta'] = json.loads(str(ckpt['meta']))
+            ckpt['path'] = path
+        except Exception as e:
+            print(f"Skipping unreadable checkpoint {path}: {e}")
+            continue
+        yield ckpt
+
+def load_checkpoint(folder='./data/checkpoints'):
+    # Newest readable checkpoint, or None
+    return next(load_checkpoints(folder), None)
+
+def check_board(ckpt, n_cells):
+    # A checkpoint only restores onto a board of the same size
+    saved = len(ckpt['meta']['game']['free_cells'])
+    if saved != n_cells:
+        raise ValueError(f"Checkpoint {ckpt['path']} was saved on a board of {saved} cells, "
+                         f"not {n_cells}; set RESUME = False to start a fresh run")
+
+def restore_agent(agent, ckpt):
+    # Model, optimizer, replay memory and counters. epsilon follows from n_games,
+    # so the random-exploration warm-up is not repeated.
+    meta = ckpt['meta']
+    agent.model.load_state_dict({key[len('model/'):]: arr for key, arr in ckpt.items()
+                                 if key.startswith('model/')})
+    agent.memory.load_state_dict({key[len('memory/'):]: arr for key, arr in ckpt.items()
+                                  if key.startswith('memory/')})
+    agent.memory.rng.bit_generator.state = meta['memory_rng']
+    agent.n_games = meta['n_games']
+    agent.record = meta['record']
+    agent.total_score = meta['total_score']
+
+def restore_game(game, ckpt, recorder=None):
+    # Board position, the running game's recorded actions and the random number
+    # generators; call after the game is created, since creating it already
+    # draws from them
+    meta = ckpt['meta']
+    state = meta['game']
+    check_board(ckpt, game.n_cells)
+    game.reset()
+    game.set_snake([Point(*pt) for pt in state['snake']], Direction[state['direction']])
+    game.food = Point(*state['food'])
+    game.score = state['score']
+    game.frame_iteration = state['frame_iteration']
+    game.steps_per_food = state['steps_per_food']
+    # set_snake rebuilds the free-cell index in a fresh order; restore the saved
+    # one so the next food positions are the ones the interrupted run would draw
+    game.free_cells = state['free_cells']
+    game.n_free = state['n_free']
+    for i, cell in enumerate(game.free_cells):
+        game.free_pos[cell] = i
+    game.episode_seed = state['episode_seed']
+    _set_rng_state(game.seed_rng, state['seed_rng'])
+    _set_rng_state(game.food_rng, state['food_rng'])
+    if recorder is not None:
+        recorder.actions = list(meta['episode_actions'])
+
+    _set_rng_state(random, meta['random'])
+    name, keys, pos, has_gauss, cached = meta['np_random']
+    np.random.set_state((name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached))
+
+def clear_checkpoints(folder='./data/checkpoints'):
+    if os.path.exists(folder):
+        shutil.rmtree(folder)
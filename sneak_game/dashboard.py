@@ -1,13 +1,33 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+from analytics import IncrementalStats
+from logger import load_board_size
+from store import GameStore
+from vec_env import DEATH_REASONS
 
 # Paths
 train_log = './data/training_log.csv'
 pos_log = './data/positions_log.csv'
 
+# Dashboard Control
+INCREMENTAL = False # True: use running aggregates (constant memory) instead of loading the full logs
+LIVE = False # True: keep refreshing the incremental view while training runs
+REFRESH_SECONDS = 5
+GAME_RANGE = None # e.g. (5000, 5100): drill into these games from the indexed store (LOG_FORMAT='store')
+DEATH_REASON = None # with GAME_RANGE: only games that ended this way, e.g. 'Collision_Self'
+MIN_SCORE = None # with GAME_RANGE: only games scoring at least this much
+
 def show_dashboard():
+    if GAME_RANGE is not None:
+        show_game_range(*GAME_RANGE, death_reason=DEATH_REASON, min_score=MIN_SCORE)
+        return
+    if INCREMENTAL or LIVE:
+        show_incremental_dashboard(live=LIVE)
+        return
+
     if not os.path.exists(train_log) or not os.path.exists(pos_log):
         print("Data files not found in ./data/")
         return
@@ -21,6 +41,90 @@ def show_dashboard():
     fig = plt.figure(figsize=(16, 12), layout="constrained")
     gs = fig.add_gridspec(2, 2)
 
+    _plot_episode_panels(fig, gs, df_train, df_train['Death_Reason'].value_counts())
+
+    # 4. Heatmap
+    ax4 = fig.add_subplot(gs[1, 1])
+    # 2D Histogram
+    h = ax4.hist2d(df_pos['X'], df_pos['Y'], bins=(32, 24), cmap='hot', cmin=1)
+    fig.colorbar(h[3], ax=ax4, label='Visits')
+    ax4.set_title("Snake Heatmap")
+    ax4.invert_yaxis() # Match pygame coordinates
+
+    plt.suptitle("Snake AI Analytics Dashboard", fontsize=16)
+    plt.show()
+
+def show_incremental_dashboard(live=False, refresh_seconds=REFRESH_SECONDS):
+    # Reads only the log data appended since the last run (see analytics.py)
+    w, h = load_board_size('./data')
+    stats = IncrementalStats('./data', w, h)
+    stats.update()
+    stats.save()
+    if len(stats.episodes) == 0:
+        print("Data files not found in ./data/")
+        return
+
+    sns.set_theme(style="darkgrid")
+    fig = plt.figure(figsize=(16, 12), layout="constrained")
+    if live:
+        plt.ion()
+
+    while True:
+        fig.clear()
+        gs = fig.add_gridspec(2, 2)
+        _plot_episode_panels(fig, gs, stats.episodes_frame(), stats.death_reason_counts())
+
+        # 4. Heatmap from the running 32x24 visit counts
+        ax4 = fig.add_subplot(gs[1, 1])
+        visits = np.ma.masked_less(stats.heatmap.T, 1) # Same as cmin=1
+        mesh = ax4.pcolormesh(np.linspace(0, stats.w, stats.heatmap.shape[0] + 1),
+                              np.linspace(0, stats.h, stats.heatmap.shape[1] + 1),
+                              visits, cmap='hot')
+        fig.colorbar(mesh, ax=ax4, label='Visits')
+        ax4.set_title("Snake Heatmap")
+        ax4.invert_yaxis() # Match pygame coordinates
+
+        fig.suptitle("Snake AI Analytics Dashboard", fontsize=16)
+        if not live:
+            plt.show()
+            return
+
+        plt.pause(refresh_seconds)
+        if not plt.fignum_exists(fig.number):
+            return
+        if stats.update():
+            stats.save()
+
+def show_game_range(first, last, death_reason=None, min_score=None):
+    # Reads only the selected games: their episode records by binary search on
+    # Game_No and their positions through the store index (see store.py)
+    store = GameStore('./data')
+    episodes = store.query(first, last, death_reason=death_reason, min_score=min_score)
+    if len(episodes) == 0:
+        print(f"No matching games between {first} and {last} in ./data/store/")
+        return
+    positions = store.positions_for(episodes['Game_No'])
+
+    df_train = pd.DataFrame({name: episodes[name] for name in episodes.dtype.names})
+    df_train['Death_Reason'] = [DEATH_REASONS[code] for code in episodes['Death_Reason']]
+
+    sns.set_theme(style="darkgrid")
+    fig = plt.figure(figsize=(16, 12), layout="constrained")
+    gs = fig.add_gridspec(2, 2)
+    _plot_episode_panels(fig, gs, df_train, df_train['Death_Reason'].value_counts())
+
+    # 4. Heatmap of the selected games only
+    ax4 = fig.add_subplot(gs[1, 1])
+    if len(positions) > 0:
+        h = ax4.hist2d(positions['X'], positions['Y'], bins=(32, 24), cmap='hot', cmin=1)
+        fig.colorbar(h[3], ax=ax4, label='Visits')
+    ax4.set_title(f"Snake Heatmap ({len(episodes)} games, {len(positions)} steps)")
+    ax4.invert_yaxis() # Match pygame coordinates
+
+    plt.suptitle(f"Snake AI Analytics Dashboard: games {first}-{last}", fontsize=16)
+    plt.show()
+
+def _plot_episode_panels(fig, gs, df_train, death_counts):
     # 1. Score History
     ax1 = fig.add_subplot(gs[0, 0])
     sns.lineplot(data=df_train, x='Game_No', y='Score', ax=ax1, label='Score', alpha=0.6)
@@ -30,7 +134,6 @@ def show_dashboard():
 
     # 2. Death Analysis
     ax2 = fig.add_subplot(gs[0, 1])
-    death_counts = df_train['Death_Reason'].value_counts()
     if len(death_counts) > 0:
         ax2.pie(death_counts, labels=death_counts.index, autopct='%1.1f%%', startangle=140)
     ax2.set_title("Death Reasons")
@@ -41,16 +144,5 @@ def show_dashboard():
     sns.scatterplot(data=df_train, x='Score', y='Avg_Steps', ax=ax3, hue='Death_Reason', alpha=0.7)
     ax3.set_title("Efficiency: Steps per Food vs Score")
 
-    # 4. Heatmap
-    ax4 = fig.add_subplot(gs[1, 1])
-    # 2D Histogram
-    h = ax4.hist2d(df_pos['X'], df_pos['Y'], bins=(32, 24), cmap='hot', cmin=1)
-    fig.colorbar(h[3], ax=ax4, label='Visits')
-    ax4.set_title("Snake Heatmap")
-    ax4.invert_yaxis() # Match pygame coordinates
-
-    plt.suptitle("Snake AI Analytics Dashboard", fontsize=16)
-    plt.show()
-
 if __name__ == '__main__':
     show_dashboard()
@@ -0,0 +1,176 @@
+import os
+import sys
+import glob
+import time
+import atexit
+import shutil
+import numpy as np
+from game import SnakeGameAI, BLOCK_SIZE
+from vec_env import DEATH_REASONS
+from logger import save_atomic
+
+# Compact episode recordings. A game is fully determined by the board size,
+# its episode seed (food positions, see SnakeGameAI.reset) and its actions,
+# so instead of one position row per frame each game is stored as one index
+# record plus its actions packed four to a byte (0=straight, 1=right, 2=left).
+# Positions are regenerated on demand by replaying the game.
+#
+# Layout: numbered segments in <log_dir>/recordings/
+#   NNNNNN_index.npy    EPISODE_INDEX_DTYPE records
+#   NNNNNN_actions.npy  uint8 blob; record i owns bytes [Offset, Offset + ceil(Steps / 4))
+
+EPISODE_INDEX_DTYPE = np.dtype([('Game_No', '<i4'), ('Seed', '<u8'), ('Steps', '<i4'), ('Score', '<i4'),
+                                ('Death_Reason', 'i1'), ('Cols', '<i2'), ('Rows', '<i2'), ('Offset', '<i8')])
+
+def pack_actions(actions):
+    # 2 bits per action, first action in the lowest bits of byte 0
+    a = np.asarray(actions, dtype=np.uint8)
+    a = np.concatenate([a, np.zeros(-len(a) % 4, dtype=np.uint8)]).reshape(-1, 4)
+    return a[:, 0] | (a[:, 1] << 2) | (a[:, 2] << 4) | (a[:, 3] << 6)
+
+def unpack_actions(packed, n_steps):
+    packed = np.asarray(packed, dtype=np.uint8)
+    a = np.stack([packed & 3, (packed >> 2) & 3, (packed >> 4) & 3, packed >> 6], axis=1)
+    return a.ravel()[:n_steps]
+
+class EpisodeRecorder:
+    # Collects the actions of the running game with record_step() and stores
+    # the finished game with end_episode(). Like TrainingLogger, finished games
+    # are buffered and written in bulk (flush_games or flush_seconds), each
+    # segment through a temporary file and rename; close() is registered with atexit.
+    def __init__(self, log_dir='./data', w=640, h=480, flush_games=1000, flush_seconds=5.0):
+        self.folder = os.path.join(log_dir, 'recordings')
+        self.cols = w // BLOCK_SIZE
+        self.rows = h // BLOCK_SIZE
+        self.flush_games = flush_games
+        self.flush_seconds = flush_seconds
+        self.actions = [] # running game
+        self.index = []
+        self.blobs = []
+        self.blob_size = 0
+        self.last_flush = time.monotonic()
+        self.closed = False
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        # Continue numbering after the segments of a previous run
+        self.segment = len(glob.glob(os.path.join(self.folder, '*_index.npy')))
+        atexit.register(self.close)
+
+    def record_step(self, action):
+        # action: index (0=straight, 1=right, 2=left) or one-hot list
+        self.actions.append(action if np.isscalar(action) else int(np.argmax(action)))
+
+    def end_episode(self, game_no, seed, score, death_reason):
+        packed = pack_actions(self.actions)
+        self.index.append((game_no, seed, len(self.actions), score, DEATH_REASONS.index(death_reason),
+                           self.cols, self.rows, self.blob_size))
+        self.blobs.append(packed)
+        self.blob_size += len(packed)
+        self.actions = []
+        if len(self.index) >= self.flush_games or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.index:
+            return
+        name = f'{self.segment:06d}'
+        blob = np.concatenate(self.blobs) if self.blobs else np.zeros(0, dtype=np.uint8)
+        # Actions first, so an index segment never points at a missing blob
+        save_atomic(os.path.join(self.folder, f'{name}_actions.npy'), blob)
+        save_atomic(os.path.join(self.folder, f'{name}_index.npy'), np.array(self.index, dtype=EPISODE_INDEX_DTYPE))
+        self.segment += 1
+        self.index = []
+        self.blobs = []
+        self.blob_size = 0
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        atexit.unregister(self.close)
+
+def load_index(log_dir='./data'):
+    # All index records, with a Segment field added so actions can be found
+    folder = os.path.join(log_dir, 'recordings')
+    dtype = np.dtype(EPISODE_INDEX_DTYPE.descr + [('Segment', '<i4')])
+    parts = []
+    for path in sorted(glob.glob(os.path.join(folder, '*_index.npy'))):
+        index = np.load(path)
+        part = np.zeros(len(index), dtype=dtype)
+        for name in EPISODE_INDEX_DTYPE.names:
+            part[name] = index[name]
+        part['Segment'] = int(os.path.basename(path)[:6])
+        parts.append(part)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+def load_actions(record, log_dir='./data'):
+    path = os.path.join(log_dir, 'recordings', f"{record['Segment']:06d}_actions.npy")
+    blob = np.load(path, mmap_mode='r')
+    start = int(record['Offset'])
+    return unpack_actions(blob[start:start + (int(record['Steps']) + 3) // 4], int(record['Steps']))
+
+def find_episode(game_no, log_dir='./data'):
+    index = load_index(log_dir)
+    matches = index[index['Game_No'] == game_no]
+    if len(matches) == 0:
+        raise KeyError(f"No recording of game {game_no} in {log_dir}/recordings")
+    return matches[-1]
+
+def replay_episode(record, log_dir='./data', render=False, speed=None):
+    # Replays a recorded game through SnakeGameAI and returns the head
+    # positions in pixels as an (Steps, 2) int array (the same values the
+    # position log held). With render=True the game is drawn in a window.
+    actions = load_actions(record, log_dir)
+    game = SnakeGameAI(int(record['Cols']) * BLOCK_SIZE, int(record['Rows']) * BLOCK_SIZE,
+                       headless=not render)
+    if render and speed is not None:
+        game.renderer.speed = speed
+    game.reset(episode_seed=int(record['Seed']))
+    one_hot = np.eye(3, dtype=int)
+    positions = np.zeros((len(actions), 2), dtype=np.int32)
+    death_reason = None
+    for i, action in enumerate(actions):
+        _, done, score, _, death_reason = game.play_step(one_hot[action], int(record['Game_No']))
+        positions[i] = game.head.x, game.head.y
+    if score != record['Score'] or DEATH_REASONS.index(death_reason) != record['Death_Reason']:
+        raise RuntimeError(f"Replay of game {record['Game_No']} diverged from the recording "
+                           f"(score {score} vs {record['Score']})")
+    return positions
+
+def truncate_recordings(log_dir, n_games):
+    # Drop the recordings of games after n_games (see logger.truncate_logs).
+    # Segments are rewritten, possibly empty, but never removed, so the
+    # segment numbering of EpisodeRecorder stays valid. Returns True if
+    # anything was removed.
+    changed = False
+    folder = os.path.join(log_dir, 'recordings')
+    for path in sorted(glob.glob(os.path.join(folder, '*_index.npy'))):
+        index = np.load(path)
+        keep = index['Game_No'] <= n_games
+        if keep.all():
+            continue
+        index = index[keep]
+        actions_path = path[:-len('index.npy')] + 'actions.npy'
+        end = int((index['Offset'] + (index['Steps'] + 3) // 4).max()) if len(index) else 0
+        # Index first, so it never points past the end of the actions
+        save_atomic(path, index)
+        save_atomic(actions_path, np.load(actions_path)[:end])
+        changed = True
+    return changed
+
+def clear_recordings(log_dir='./data'):
+    path = os.path.join(log_dir, 'recordings')
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    # python episodes.py GAME_NO [SPEED]: re-render a recorded game
+    if len(sys.argv) < 2:
+        print("Usage: python episodes.py GAME_NO [SPEED]")
+        sys.exit(1)
+    record = find_episode(int(sys.argv[1]))
+    print(f"Game {record['Game_No']}: score {record['Score']}, {record['Steps']} steps, "
+          f"{DEATH_REASONS[record['Death_Reason']]}")
+    replay_episode(record, render=True, speed=int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+from model import ManualModel
+from policy import PolicyCache
+from game import BLOCK_SIZE
+from observation import observation_from_size
+from vec_env import VecSnakeGame, DEATH_REASONS, ALIVE
+
+# Evaluation Control
+N_GAMES = 5000
+N_ENVS = 1024 # games stepped in lockstep
+SEED = 0
+GRID_CELLS = (32, 24) # (cols, rows); use the board the model was trained on
+MODEL_PATH = './data/model_weights.npz' # model_weights.npz or a data/checkpoints/checkpoint_*.npz
+OUTPUT = './data/eval_results.jsonl' # one JSON line per evaluation, appended
+
+def load_model(path=MODEL_PATH):
+    # Weights only (no optimizer state); checkpoints keep them under model/*.
+    # load_state_dict takes the layer sizes from the file, so the sizes passed
+    # to the constructor do not matter.
+    with np.load(path) as data:
+        weights = {}
+        for key in data.files:
+            name = key[len('model/'):] if key.startswith('model/') else key
+            if name[0] in 'Wb':
+                weights[name] = data[key]
+    model = ManualModel(1, [], 1)
+    model.load_state_dict(weights)
+    return model
+
+def play_greedy(model, n_games=N_GAMES, n_envs=N_ENVS, seed=SEED, grid_cells=GRID_CELLS):
+    # Plays n_games epsilon-free games. Slot i of the batched environment plays a
+    # fixed quota of games and every game it starts is counted, so long games
+    # are not under-represented the way they would be by taking the first
+    # n_games to finish. The observation is chosen from the model's input size.
+    n_envs = min(n_envs, n_games)
+    env = VecSnakeGame(n_envs, grid_cells[0] * BLOCK_SIZE, grid_cells[1] * BLOCK_SIZE, seed=seed)
+    observation, window = observation_from_size(model.layers[0].shape[0])
+    policy = PolicyCache(model, n_features=11) if observation == 'basic' else None
+    one_hot = np.eye(3, dtype=np.int8)
+
+    quota = np.full(n_envs, n_games // n_envs)
+    quota[:n_games % n_envs] += 1
+    played = np.zeros(n_envs, dtype=np.int64)
+    steps = np.zeros(n_envs, dtype=np.int64)
+    scores, reasons, game_steps = [], [], []
+
+    while (played < quota).any():
+        if policy is not None:
+            moves = policy.best_action(env.get_states(np.uint8))
+        else:
+            moves = np.argmax(model.predict(env.get_states(observation=observation, window=window)), axis=1)
+        actions = one_hot[moves]
+        _, dones, final_scores, _, codes = env.step(actions)
+        steps += 1
+        counted = np.flatnonzero(dones & (played < quota))
+        scores.append(final_scores[counted])
+        reasons.append(codes[counted])
+        game_steps.append(steps[counted])
+        played[dones] += 1
+        steps[dones] = 0
+
+    return np.concatenate(scores), np.concatenate(reasons), np.concatenate(game_steps)
+
+def summarize(scores, reasons, game_steps):
+    # Steps per food uses the training log's definition: steps / (score + 1)
+    steps_per_food = game_steps / (scores + 1)
+    return {
+        'games': int(len(scores)),
+        'score_mean': float(scores.mean()),
+        'score_std': float(scores.std()),
+        'score_percentiles': {str(p): float(np.percentile(scores, p)) for p in (10, 25, 50, 75, 90, 99)},
+        'score_max': int(scores.max()),
+        'death_reasons': {DEATH_REASONS[code]: int((reasons == code).sum())
+                          for code in range(len(DEATH_REASONS)) if code != ALIVE},
+        'steps_per_food_mean': float(steps_per_food.mean()),
+        'steps_per_food_median': float(np.median(steps_per_food)),
+        'steps_mean': float(game_steps.mean()),
+    }
+
+def evaluate(path=MODEL_PATH, n_games=N_GAMES, n_envs=N_ENVS, seed=SEED, output=OUTPUT, grid_cells=GRID_CELLS):
+    model = load_model(path)
+    start = time.perf_counter()
+    scores, reasons, game_steps = play_greedy(model, n_games, n_envs, seed, grid_cells)
+    elapsed = time.perf_counter() - start
+
+    result = summarize(scores, reasons, game_steps)
+    result.update({'model': path, 'seed': seed, 'grid_cells': list(grid_cells), 'seconds': round(elapsed, 3),
+                   'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')})
+
+    print(f"{path}: {result['games']} greedy games in {elapsed:.2f} s ({result['games'] / elapsed:.0f} games/s)")
+    pct = result['score_percentiles']
+    print(f"  Score: mean {result['score_mean']:.2f} +- {result['score_std']:.2f}, max {result['score_max']}")
+    print("  Percentiles: " + ', '.join(f"p{p} {v:g}" for p, v in pct.items()))
+    counts, edges = np.histogram(scores, bins=min(10, int(scores.max()) + 1))
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        print(f"    {low:6.1f}-{high:6.1f} {count:6d} {'#' * int(50 * count / counts.max())}")
+    print("  Death reasons: " + ', '.join(f"{name} {n} ({n / result['games']:.1%})"
+                                           for name, n in result['death_reasons'].items()))
+    print(f"  Steps per food: mean {result['steps_per_food_mean']:.1f}, median {result['steps_per_food_median']:.1f}")
+
+    if output:
+        folder = os.path.dirname(output)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        with open(output, 'a') as f:
+            f.write(json.dumps(result) + '\n')
+    return result
+
+if __name__ == '__main__':
+    # python evaluate.py [model_or_checkpoint.npz ...] -- several paths are compared on the same seed
+    for path in sys.argv[1:] or [MODEL_PATH]:
+        evaluate(path)
@@ -1,13 +1,8 @@
-import pygame
 import random
 from enum import Enum
-from collections import namedtuple
+from collections import namedtuple, deque
 import numpy as np
 
-pygame.init()
-# Use system font to avoid missing file errors
-font = pygame.font.SysFont('arial', 25)
-
 class Direction(Enum):
     RIGHT = 1
     LEFT = 2
@@ -18,56 +13,110 @@ Point = namedtuple('Point', 'x, y')
 
 # Constants
 BLOCK_SIZE = 20
-SPEED = 60 # Optimized speed
-WHITE = (255, 255, 255)
-RED = (200, 0, 0)
-BLUE1 = (0, 0, 255)
-BLUE2 = (0, 100, 255)
-BLACK = (0, 0, 0)
 
 class SnakeGameAI:
-    def __init__(self, w=640, h=480):
+    # Pure game logic. Rendering is an optional observer (see renderer.py);
+    # with headless=True pygame is never imported and play_step never sleeps.
+    # Every episode draws its food positions from its own generator seeded with
+    # episode_seed, so an episode is fully determined by that seed and its
+    # actions (see episodes.py). The episode seeds come from a generator seeded
+    # with `seed`, or from the global `random` module when seed is None.
+    def __init__(self, w=640, h=480, headless=False, seed=None):
         self.w = w
         self.h = h
-        self.display = pygame.display.set_mode((self.w, self.h))
-        pygame.display.set_caption('Snake AI')
-        self.clock = pygame.time.Clock()
+        self.cols = w // BLOCK_SIZE
+        self.rows = h // BLOCK_SIZE
+        self.n_cells = self.cols * self.rows
+        self.renderer = None
+        self.seed_rng = random.Random(random.getrandbits(64) if seed is None else seed)
+        self.food_rng = random.Random()
+        if not headless:
+            # Imported lazily so headless runs work on machines without a display
+            from renderer import PygameRenderer
+            self.attach_renderer(PygameRenderer(self.w, self.h, BLOCK_SIZE))
         self.reset()
+
+    def attach_renderer(self, renderer):
+        self.renderer = renderer
+
+    def detach_renderer(self):
+        self.renderer = None
         
-    def reset(self):
-        self.direction = Direction.RIGHT
-        self.head = Point(self.w/2, self.h/2)
-        self.snake = [self.head, 
-                      Point(self.head.x-BLOCK_SIZE, self.head.y),
-                      Point(self.head.x-(2*BLOCK_SIZE), self.head.y)]
+    def reset(self, episode_seed=None):
+        # episode_seed replays a recorded episode; by default the next seed is drawn
+        if episode_seed is None:
+            episode_seed = self.seed_rng.getrandbits(32)
+        self.episode_seed = episode_seed
+        self.food_rng.seed(episode_seed)
+
+        head = Point(self.w/2, self.h/2)
+        self.set_snake([head, 
+                        Point(head.x-BLOCK_SIZE, head.y),
+                        Point(head.x-(2*BLOCK_SIZE), head.y)], Direction.RIGHT)
+
         self.score = 0
         self.food = None
         self._place_food()
         self.frame_iteration = 0
         self.steps_per_food = 0
+
+    def set_snake(self, body, direction):
+        # Place a snake (head first, pixel Points) and rebuild the occupancy
+        # structures around it; used by reset() and to set up benchmark positions
+        self.direction = direction
+        self.snake = deque(body)
+        self.head = self.snake[0]
+
+        # occupied marks every body cell except the head (i.e. snake[1:]),
+        # which is exactly what is_collision has to test against.
+        # free_cells[:n_free] lists the cells not covered by the snake and
+        # free_pos maps a cell back to its slot, so food placement is O(1).
+        self.occupied = np.zeros((self.rows, self.cols), dtype=bool)
+        self.free_cells = list(range(self.n_cells))
+        self.free_pos = list(range(self.n_cells))
+        self.n_free = self.n_cells
+        for i, pt in enumerate(self.snake):
+            self._take_cell(self._cell(pt))
+            if i > 0:
+                self.occupied[int(pt.y) // BLOCK_SIZE, int(pt.x) // BLOCK_SIZE] = True
+
+    def _cell(self, pt):
+        return (int(pt.y) // BLOCK_SIZE) * self.cols + int(pt.x) // BLOCK_SIZE
+
+    def _take_cell(self, cell):
+        # Swap the cell with the last free slot and shrink the free region
+        i = self.free_pos[cell]
+        last = self.free_cells[self.n_free - 1]
+        self.free_cells[i], self.free_cells[self.n_free - 1] = last, cell
+        self.free_pos[last], self.free_pos[cell] = i, self.n_free - 1
+        self.n_free -= 1
+
+    def _release_cell(self, cell):
+        # Swap the cell into the first slot past the free region and grow it
+        i = self.free_pos[cell]
+        first = self.free_cells[self.n_free]
+        self.free_cells[i], self.free_cells[self.n_free] = first, cell
+        self.free_pos[first], self.free_pos[cell] = i, self.n_free
+        self.n_free += 1
         
     def _place_food(self):
-        x = random.randint(0, (self.w-BLOCK_SIZE)//BLOCK_SIZE )*BLOCK_SIZE 
-        y = random.randint(0, (self.h-BLOCK_SIZE)//BLOCK_SIZE )*BLOCK_SIZE
-        self.food = Point(x, y)
-        if self.food in self.snake:
-            self._place_food()
+        if self.n_free == 0:
+            # Board is full; park the food off-grid so it can never be eaten
+            self.food = Point(-BLOCK_SIZE, -BLOCK_SIZE)
+            return
+        y, x = divmod(self.free_cells[self.food_rng.randrange(self.n_free)], self.cols)
+        self.food = Point(x*BLOCK_SIZE, y*BLOCK_SIZE)
         
     def play_step(self, action, game_number=0):
         self.frame_iteration += 1
         self.steps_per_food += 1
         
-        # 1. Collect user input
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
-        
-        # 2. Move
+        # 1. Move
+        old_head = self.head
         self._move(action)
-        self.snake.insert(0, self.head)
+        self.snake.appendleft(self.head)
         
-        # 3. Check if game over
+        # 2. Check if game over
         reward = 0
         game_over = False
         death_reason = None
@@ -87,18 +136,22 @@ class SnakeGameAI:
             death_reason = "Timeout"
             return reward, game_over, self.score, self.steps_per_food, death_reason
             
-        # 4. Place new food or just move
+        # 3. Update the occupancy grid, then place new food or just move
+        self.occupied[int(old_head.y) // BLOCK_SIZE, int(old_head.x) // BLOCK_SIZE] = True
+        self._take_cell(self._cell(self.head))
         if self.head == self.food:
             self.score += 1
             reward = 10
             self._place_food()
             self.steps_per_food = 0
         else:
-            self.snake.pop()
+            tail = self.snake.pop()
+            self.occupied[int(tail.y) // BLOCK_SIZE, int(tail.x) // BLOCK_SIZE] = False
+            self._release_cell(self._cell(tail))
         
-        # 5. Update UI and clock
-        self._update_ui(game_number)
-        self.clock.tick(SPEED)
+        # 4. Notify the renderer (if any)
+        if self.renderer is not None:
+            self.renderer.render(self, game_number)
         return reward, game_over, self.score, self.steps_per_food, None
     
     def is_collision(self, pt=None):
@@ -106,19 +159,8 @@ class SnakeGameAI:
             pt = self.head
         if pt.x > self.w - BLOCK_SIZE or pt.x < 0 or pt.y > self.h - BLOCK_SIZE or pt.y < 0:
             return True
-        if pt in self.snake[1:]:
-            return True
-        return False
-        
-    def _update_ui(self, game_no):
-        self.display.fill(BLACK)
-        for pt in self.snake:
-            pygame.draw.rect(self.display, BLUE1, pygame.Rect(pt.x, pt.y, BLOCK_SIZE, BLOCK_SIZE))
-            pygame.draw.rect(self.display, BLUE2, pygame.Rect(pt.x+4, pt.y+4, 12, 12))
-        pygame.draw.rect(self.display, RED, pygame.Rect(self.food.x, self.food.y, BLOCK_SIZE, BLOCK_SIZE))
-        text = font.render(f"Score: {self.score} | Game: {game_no}", True, WHITE)
-        self.display.blit(text, [0, 0])
-        pygame.display.flip()
+        # O(1) lookup instead of scanning self.snake[1:]
+        return bool(self.occupied[int(pt.y) // BLOCK_SIZE, int(pt.x) // BLOCK_SIZE])
         
     def _move(self, action):
         clock_wise = [Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP]
@@ -1,16 +1,111 @@
-import matplotlib.pyplot as plt
-
-plt.ion()
-
-def plot(scores, mean_scores):
-    plt.clf()
-    plt.title('Training...')
-    plt.xlabel('Number of Games')
-    plt.ylabel('Score')
-    plt.plot(scores)
-    plt.plot(mean_scores)
-    plt.ylim(ymin=0)
-    plt.text(len(scores)-1, scores[-1], str(scores[-1]))
-    plt.text(len(mean_scores)-1, mean_scores[-1], str(mean_scores[-1]))
-    plt.show(block=False)
-    plt.pause(.1)
+import time
+import queue
+import multiprocessing as mp
+
+# matplotlib is imported lazily so that PLOT_MODE='off' never loads it
+
+class _LivePlot:
+    # Score/mean-score figure built once; new points only update the existing
+    # line artists instead of clearing and replotting the whole history
+    def __init__(self):
+        import matplotlib.pyplot as plt
+        plt.ion()
+        self.fig, self.ax = plt.subplots()
+        self.ax.set_title('Training...')
+        self.ax.set_xlabel('Number of Games')
+        self.ax.set_ylabel('Score')
+        self.score_line, = self.ax.plot([], [])
+        self.mean_line, = self.ax.plot([], [])
+        self.score_text = self.ax.text(0, 0, '')
+        self.mean_text = self.ax.text(0, 0, '')
+        self.scores = []
+        self.mean_scores = []
+        plt.show(block=False)
+
+    def append(self, score, mean_score):
+        self.scores.append(score)
+        self.mean_scores.append(mean_score)
+
+    def draw(self):
+        if not self.scores:
+            return
+        x = range(len(self.scores))
+        self.score_line.set_data(x, self.scores)
+        self.mean_line.set_data(x, self.mean_scores)
+        last = len(self.scores) - 1
+        self.score_text.set_position((last, self.scores[-1]))
+        self.score_text.set_text(str(self.scores[-1]))
+        self.mean_text.set_position((last, self.mean_scores[-1]))
+        self.mean_text.set_text(str(self.mean_scores[-1]))
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.set_ylim(bottom=0)
+        self.fig.canvas.draw_idle()
+        self.pump()
+
+    def pump(self):
+        # Let the GUI process window events without sleeping like plt.pause
+        self.fig.canvas.flush_events()
+
+def _plot_process(points, min_interval):
+    live = _LivePlot()
+    last_draw = 0.0
+    dirty = False
+    try:
+        while True:
+            try:
+                item = points.get(timeout=min_interval)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                live.append(*item)
+                dirty = True
+            if dirty and time.monotonic() - last_draw >= min_interval:
+                live.draw()
+                last_draw = time.monotonic()
+                dirty = False
+            else:
+                live.pump()
+        live.draw()
+    except KeyboardInterrupt:
+        # Ctrl+C reaches the whole process group; the trainer handles shutdown
+        pass
+
+class ProgressPlotter:
+    # Training-progress plot that never blocks the training loop.
+    #   mode='process': a separate process owns the figure and is fed through a queue
+    #   mode='inline':  same figure in this process, redrawn at most every min_interval s
+    #   mode='off':     nothing is plotted and matplotlib is never imported
+    def __init__(self, mode='process', min_interval=1.0):
+        if mode not in ('process', 'inline', 'off'):
+            raise ValueError(f"Unknown plot mode: {mode}")
+        self.mode = mode
+        self.min_interval = min_interval
+        self.last_draw = 0.0
+        if mode == 'process':
+            # spawn: the child starts clean instead of inheriting the trainer's state
+            ctx = mp.get_context('spawn')
+            self.points = ctx.Queue()
+            self.process = ctx.Process(target=_plot_process, args=(self.points, min_interval), daemon=True)
+            self.process.start()
+        elif mode == 'inline':
+            self.live = _LivePlot()
+
+    def add(self, score, mean_score):
+        if self.mode == 'process':
+            self.points.put((score, mean_score))
+        elif self.mode == 'inline':
+            self.live.append(score, mean_score)
+            if time.monotonic() - self.last_draw >= self.min_interval:
+                self.live.draw()
+                self.last_draw = time.monotonic()
+
+    def close(self):
+        if self.mode == 'process':
+            self.points.put(None)
+            self.process.join(timeout=5)
+        elif self.mode == 'inline':
+            self.live.draw()
+        self.mode = 'off'
@@ -0,0 +1,107 @@
+import os
+import sys
+import numpy as np
+
+# Compact inference artifacts and a NumPy-only loader for them. Nothing here
+# imports model.py, game.py or pygame, so an inference process only pays for
+# importing NumPy.
+#
+# Formats (written by export()):
+#   'float16': W1/b1... stored as float16
+#   'int8':    W1... as int8 with one symmetric scale per layer (W ~ q * W1_scale),
+#              biases as float32 (a few hundred values)
+# The format name is stored under 'format'. Weights are dequantized to float32
+# once at load time, so predict() is a plain float32 forward pass.
+
+FORMATS = ('float16', 'int8')
+
+def _read_weights(path):
+    # W1/b1... from model_weights.npz or from a checkpoint (model/* keys)
+    with np.load(path) as data:
+        weights = {}
+        for key in data.files:
+            name = key[len('model/'):] if key.startswith('model/') else key
+            if name[0] in 'Wb' and name[1:].isdigit():
+                weights[name] = data[key]
+    return weights
+
+def export(src='./data/model_weights.npz', dst=None, fmt='int8'):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt} (choose from {FORMATS})")
+    if dst is None:
+        dst = os.path.join(os.path.dirname(src), f'model_{fmt}.npz')
+    weights = _read_weights(src)
+    out = {'format': np.array(fmt)}
+    for name, arr in weights.items():
+        if fmt == 'float16':
+            out[name] = arr.astype(np.float16)
+        elif name[0] == 'b':
+            out[name] = arr.astype(np.float32)
+        else:
+            scale = float(np.abs(arr).max()) / 127 or 1.0
+            out[name] = np.clip(np.round(arr / scale), -127, 127).astype(np.int8)
+            out[f'{name}_scale'] = np.array(scale, dtype=np.float32)
+    np.savez(dst, **out)
+    return dst
+
+class LiteModel:
+    # Loads an exported artifact (or model_weights.npz itself) for inference
+    def __init__(self, path, dtype=np.float32):
+        self.layers = []
+        self.biases = []
+        with np.load(path) as data:
+            self.format = str(data['format']) if 'format' in data.files else 'float64'
+            i = 1
+            while f'W{i}' in data.files or f'model/W{i}' in data.files:
+                prefix = '' if f'W{i}' in data.files else 'model/'
+                W = data[f'{prefix}W{i}'].astype(dtype)
+                if f'W{i}_scale' in data.files:
+                    W *= data[f'W{i}_scale']
+                self.layers.append(W)
+                self.biases.append(data[f'{prefix}b{i}'].astype(dtype))
+                i += 1
+
+    def predict(self, x):
+        # Q-values for one (in,) state or a (B, in) batch
+        a = np.atleast_2d(np.asarray(x, dtype=self.layers[0].dtype))
+        last_idx = len(self.layers) - 1
+        for i, (W, b) in enumerate(zip(self.layers, self.biases)):
+            a = a @ W + b
+            if i < last_idx:
+                np.maximum(a, 0, out=a)
+        return a
+
+    def best_action(self, x):
+        return np.argmax(self.predict(x), axis=1)
+
+def drift_report(src, artifact, n_samples=100_000, seed=0):
+    # Compares the artifact with the float64 source. With the 11 binary inputs of
+    # the basic observation every possible state (2^11 = 2048) is checked, so the
+    # numbers are exact; larger inputs (the rich observation) are sampled uniformly
+    n_features = LiteModel(src).layers[0].shape[0]
+    if n_features == 11:
+        states = ((np.arange(2 ** n_features)[:, None] & (1 << np.arange(n_features - 1, -1, -1))) > 0)
+    else:
+        states = np.random.default_rng(seed).random((n_samples, n_features))
+    reference = LiteModel(src, dtype=np.float64).predict(states)
+    q = LiteModel(artifact).predict(states).astype(np.float64)
+    err = np.abs(q - reference)
+    return {
+        'format': LiteModel(artifact).format,
+        'bytes': os.path.getsize(artifact),
+        'source_bytes': os.path.getsize(src),
+        'max_abs_error': float(err.max()),
+        'mean_abs_error': float(err.mean()),
+        'relative_max_error': float(err.max() / (np.abs(reference).max() or 1.0)),
+        'action_agreement': float((q.argmax(axis=1) == reference.argmax(axis=1)).mean()),
+    }
+
+if __name__ == '__main__':
+    # python lite_model.py [model_weights.npz]: export both formats and report drift
+    src = sys.argv[1] if len(sys.argv) > 1 else './data/model_weights.npz'
+    for fmt in FORMATS:
+        dst = export(src, fmt=fmt)
+        r = drift_report(src, dst)
+        print(f"{dst}: {r['bytes'] / 1024:.1f} KiB (source {r['source_bytes'] / 1024:.1f} KiB), "
+              f"max |dQ| {r['max_abs_error']:.2e} ({r['relative_max_error']:.2%} of max |Q|), "
+              f"mean |dQ| {r['mean_abs_error']:.2e}, greedy actions agree on {r['action_agreement']:.2%} of states")
@@ -0,0 +1,265 @@
+import os
+import csv
+import glob
+import time
+import atexit
+import shutil
+import numpy as np
+from vec_env import DEATH_REASONS
+
+# Record layouts for the binary (npy) format. Coordinates are pixels, which
+# fit in int16 on any board pygame can open.
+POSITION_DTYPE = np.dtype([('Game_No', '<i4'), ('X', '<i2'), ('Y', '<i2')])
+EPISODE_DTYPE = np.dtype([('Game_No', '<i4'), ('Score', '<i4'), ('Record', '<i4'),
+                          ('Avg_Steps', '<f4'), ('Death_Reason', 'i1')])
+
+POSITION_HEADER = ['Game_No', 'X', 'Y']
+EPISODE_HEADER = ['Game_No', 'Score', 'Record', 'Avg_Steps', 'Death_Reason']
+
+BOARD_FILE = 'board_size.txt' # "w h" in pixels of the board the logs were recorded on
+DEFAULT_BOARD = (640, 480) # logs written before the board size was stored
+
+class TrainingLogger:
+    # Buffers position and episode records in memory and writes them in bulk
+    # once flush_rows records are pending or flush_seconds have passed.
+    #   fmt='csv': appends to positions_log.csv / training_log.csv (same layout as before)
+    #   fmt='npy': writes numbered segments positions/NNNNNN.npy and episodes/NNNNNN.npy
+    #   fmt='store': appends to the indexed, memory-mappable files in store/ (see store.py)
+    # close() (also registered with atexit) flushes whatever is still buffered.
+    # board_size=(w, h) is stored next to the logs for the heatmaps.
+    def __init__(self, log_dir='./data', fmt='csv', flush_rows=10_000, flush_seconds=5.0, board_size=None):
+        if fmt not in ('csv', 'npy', 'store'):
+            raise ValueError(f"Unknown log format: {fmt}")
+        self.log_dir = log_dir
+        self.fmt = fmt
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.positions = []
+        self.episodes = []
+        self.last_flush = time.monotonic()
+        self.closed = False
+
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        if board_size is not None:
+            save_board_size(log_dir, *board_size)
+
+        if fmt == 'csv':
+            self.pos_path = os.path.join(log_dir, 'positions_log.csv')
+            self.train_path = os.path.join(log_dir, 'training_log.csv')
+            for path, header in ((self.pos_path, POSITION_HEADER), (self.train_path, EPISODE_HEADER)):
+                if not os.path.exists(path):
+                    with open(path, 'w', newline='') as f:
+                        csv.writer(f).writerow(header)
+        elif fmt == 'store':
+            from store import StoreWriter
+            self.store = StoreWriter(log_dir)
+        else:
+            for kind in ('positions', 'episodes'):
+                folder = os.path.join(log_dir, kind)
+                if not os.path.exists(folder):
+                    os.makedirs(folder)
+            # Continue numbering after the segments of a previous run
+            self.segment = len(glob.glob(os.path.join(log_dir, 'positions', '*.npy')))
+
+        atexit.register(self.close)
+
+    def log_position(self, game_no, x, y):
+        self.positions.append((game_no, x, y))
+        if len(self.positions) >= self.flush_rows:
+            self.flush()
+        elif time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def log_episode(self, game_no, score, record, avg_steps, death_reason):
+        self.episodes.append((game_no, score, record, avg_steps, death_reason))
+        if len(self.episodes) >= self.flush_rows:
+            self.flush()
+        elif time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self.fmt == 'csv':
+            self._flush_csv()
+        elif self.fmt == 'store':
+            self.store.append(*self._records())
+        else:
+            self._flush_npy()
+        self.positions = []
+        self.episodes = []
+        self.last_flush = time.monotonic()
+
+    def _flush_csv(self):
+        # One open/write/close per file per flush instead of per record
+        if self.positions:
+            with open(self.pos_path, 'a', newline='') as f:
+                csv.writer(f).writerows(self.positions)
+        if self.episodes:
+            with open(self.train_path, 'a', newline='') as f:
+                csv.writer(f).writerows([g, s, r, f'{a:.2f}', d] for g, s, r, a, d in self.episodes)
+
+    def _records(self):
+        positions = np.array(self.positions, dtype=POSITION_DTYPE)
+        episodes = np.array([(g, s, r, a, DEATH_REASONS.index(d)) for g, s, r, a, d in self.episodes],
+                            dtype=EPISODE_DTYPE)
+        return positions, episodes
+
+    def _flush_npy(self):
+        if not self.positions and not self.episodes:
+            return
+        positions, episodes = self._records()
+        # Both kinds share the segment number so a segment pair covers the same time span
+        name = f'{self.segment:06d}.npy'
+        save_atomic(os.path.join(self.log_dir, 'positions', name), positions)
+        save_atomic(os.path.join(self.log_dir, 'episodes', name), episodes)
+        self.segment += 1
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        atexit.unregister(self.close)
+
+def save_atomic(path, arr):
+    # np.save through a temporary file and a rename, so readers polling a
+    # folder (analytics.py, episodes.py) never see a half-written segment
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, arr)
+    os.replace(tmp_path, path)
+
+def load_segments(kind, log_dir='./data'):
+    # Concatenate all npy segments of one kind ('positions' or 'episodes')
+    paths = sorted(glob.glob(os.path.join(log_dir, kind, '*.npy')))
+    dtype = POSITION_DTYPE if kind == 'positions' else EPISODE_DTYPE
+    if not paths:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate([np.load(p) for p in paths])
+
+def _csv_tail(path, chunk_bytes=1 << 16):
+    # (offset, fields) of the data rows of a CSV log, last row first. The file
+    # is read backwards in chunks, so only the rows looked at are read.
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        rest = b'' # start of the file's next row when it began in an earlier chunk
+        while pos > 0:
+            start = max(0, pos - chunk_bytes)
+            f.seek(start)
+            lines = (f.read(pos - start) + rest).split(b'\n')
+            pos = start
+            rest = lines.pop(0) if pos > 0 else b''
+            offset = pos + len(rest) + 1 if pos > 0 else 0
+            rows = []
+            for line in lines:
+                rows.append((offset, line))
+                offset += len(line) + 1
+            for offset, line in reversed(rows):
+                if line and offset > 0: # skip empty lines and the header
+                    yield offset, line.decode().split(',')
+
+def _truncate_csv(path, n_games, n_positions=None):
+    # Cut the rows after game n_games off the end of a CSV log; for the
+    # position log the first n_positions rows of game n_games + 1 stay
+    if not os.path.exists(path):
+        return False
+    tail = [] # (offset, game) of the rows after the last row to keep for sure, last first
+    for offset, row in _csv_tail(path):
+        game = int(row[0])
+        if game <= n_games:
+            break
+        tail.append((offset, game))
+    if not tail:
+        return False
+    tail.reverse()
+    kept = 0
+    if n_positions:
+        while kept < len(tail) and kept < n_positions and tail[kept][1] == n_games + 1:
+            kept += 1
+    if kept == len(tail):
+        return False
+    os.truncate(path, tail[kept][0])
+    return True
+
+def truncate_logs(log_dir, n_games, n_positions=0):
+    # Remove the games logged after game n_games, keeping the first n_positions
+    # positions of game n_games + 1. A run resumed from a checkpoint calls this
+    # so games played after the checkpoint by the previous (crashed) run are not
+    # logged twice; the same goes for the episode recordings. Removes the
+    # analytics state if anything changed, so the dashboard recomputes it.
+    changed = _truncate_csv(os.path.join(log_dir, 'training_log.csv'), n_games)
+    changed |= _truncate_csv(os.path.join(log_dir, 'positions_log.csv'), n_games, n_positions)
+
+    episode_paths = sorted(glob.glob(os.path.join(log_dir, 'episodes', '*.npy')))
+    position_paths = sorted(glob.glob(os.path.join(log_dir, 'positions', '*.npy')))
+    for path in episode_paths:
+        episodes = np.load(path)
+        keep = episodes['Game_No'] <= n_games
+        if not keep.all():
+            save_atomic(path, episodes[keep])
+            changed = True
+    for path in position_paths:
+        positions = np.load(path)
+        games = positions['Game_No']
+        keep = games <= n_games
+        # Positions of the checkpoint's game, counted across segments in order
+        current = np.flatnonzero(games == n_games + 1)
+        keep[current[:n_positions]] = True
+        n_positions = max(0, n_positions - len(current))
+        if not keep.all():
+            save_atomic(path, positions[keep])
+            changed = True
+
+    from store import truncate_store
+    from episodes import truncate_recordings
+    changed |= truncate_store(log_dir, n_games, n_positions)
+    changed |= truncate_recordings(log_dir, n_games)
+    state_path = os.path.join(log_dir, 'analytics_state.npz')
+    if changed and os.path.exists(state_path):
+        os.remove(state_path)
+    return changed
+
+def last_logged_game(log_dir='./data'):
+    # Highest game number in the episode logs of any format (0 if there are none)
+    last = 0
+    path = os.path.join(log_dir, 'training_log.csv')
+    if os.path.exists(path):
+        for _, row in _csv_tail(path):
+            last = max(last, int(row[0]))
+            break
+    paths = sorted(glob.glob(os.path.join(log_dir, 'episodes', '*.npy')))
+    for path in reversed(paths):
+        episodes = np.load(path)
+        if len(episodes):
+            last = max(last, int(episodes['Game_No'].max()))
+            break
+    path = os.path.join(log_dir, 'store', 'episodes.bin')
+    if os.path.exists(path) and os.path.getsize(path) >= EPISODE_DTYPE.itemsize:
+        with open(path, 'rb') as f:
+            f.seek((os.path.getsize(path) // EPISODE_DTYPE.itemsize - 1) * EPISODE_DTYPE.itemsize)
+            last = max(last, int(np.frombuffer(f.read(EPISODE_DTYPE.itemsize), dtype=EPISODE_DTYPE)['Game_No'][0]))
+    return last
+
+def save_board_size(log_dir, w, h):
+    with open(os.path.join(log_dir, BOARD_FILE), 'w') as f:
+        f.write(f'{int(w)} {int(h)}\n')
+
+def load_board_size(log_dir='./data'):
+    # (w, h) in pixels of the board the logs in log_dir come from
+    path = os.path.join(log_dir, BOARD_FILE)
+    if not os.path.exists(path):
+        return DEFAULT_BOARD
+    with open(path) as f:
+        w, h = f.read().split()
+    return int(w), int(h)
+
+def clear_logs(log_dir='./data'):
+    # Remove the logs of both formats (used when starting a fresh training run)
+    for name in ('training_log.csv', 'positions_log.csv', BOARD_FILE):
+        path = os.path.join(log_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    for kind in ('positions', 'episodes', 'store'):
+        path = os.path.join(log_dir, kind)
+        if os.path.exists(path):
+            shutil.rmtree(path)
@@ -1,22 +1,42 @@
 import numpy as np
 import os
+from optimizers import make_optimizer
+
+MAX_WORKSPACES = 4 # batch sizes predict() keeps buffers for; other sizes allocate per call
 
 class ManualModel:
-    def __init__(self, input_size, hidden_sizes, output_size, lr=0.001):
+    def __init__(self, input_size, hidden_sizes, output_size, lr=0.001, dtype=np.float64,
+                 optimizer='sgd', clip_norm=None):
         self.lr = lr
+        self.dtype = np.dtype(dtype) # float64 (default) or float32
         self.layers = []
         self.biases = []
+        self._workspace = {} # batch size -> preallocated buffers used by predict()
+        self.n_updates = 0 # weight updates so far (PolicyCache uses it to detect stale tables)
         
         # Layer dimensions: [input, hidden1, hidden2, ..., output]
         layer_dims = [input_size] + hidden_sizes + [output_size]
         
         for i in range(len(layer_dims) - 1):
             # Weights: (in, out)
-            W = np.random.randn(layer_dims[i], layer_dims[i+1]) * 0.1
-            b = np.zeros((1, layer_dims[i+1]))
+            W = (np.random.randn(layer_dims[i], layer_dims[i+1]) * 0.1).astype(self.dtype)
+            b = np.zeros((1, layer_dims[i+1]), dtype=self.dtype)
             self.layers.append(W)
             self.biases.append(b)
 
+        # optimizer: 'sgd', 'momentum', 'rmsprop', 'adam' or an optimizers.Optimizer
+        # clip_norm: optional max global gradient norm applied before every update
+        self.optimizer = make_optimizer(optimizer, clip_norm)
+        self._bind_training_buffers()
+
+    def _bind_training_buffers(self):
+        # Gradient buffers and optimizer state have the shapes of the parameters,
+        # so they are allocated once here (and again after load) instead of per update
+        self._params = self.layers + self.biases
+        self._grads_W = [np.empty_like(W) for W in self.layers]
+        self._grads_b = [np.empty_like(b) for b in self.biases]
+        self.optimizer.bind(self._params)
+
     def relu(self, x):
         return np.maximum(0, x)
 
@@ -45,7 +65,37 @@ class ManualModel:
         
         return z_out
 
+    def predict(self, x):
+        # Inference-only forward pass: keeps nothing for backprop and writes every
+        # layer into buffers preallocated once per batch size, so action selection
+        # allocates nothing. The returned array is reused by the next call with
+        # the same batch size; copy it if it has to be kept. Only the first
+        # MAX_WORKSPACES sizes seen are kept (in practice 1 for action selection
+        # and the evaluation batch), so varying sizes cannot grow the cache.
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+
+        buffers = self._workspace.get(len(x))
+        if buffers is None:
+            buffers = [np.empty((len(x), self.layers[0].shape[0]), dtype=self.dtype)]
+            buffers += [np.empty((len(x), W.shape[1]), dtype=self.dtype) for W in self.layers]
+            if len(self._workspace) < MAX_WORKSPACES:
+                self._workspace[len(x)] = buffers
+
+        np.copyto(buffers[0], x)
+        last_idx = len(self.layers) - 1
+        for i in range(len(self.layers)):
+            out = buffers[i+1]
+            np.dot(buffers[i], self.layers[i], out=out)
+            out += self.biases[i]
+            if i < last_idx:
+                np.maximum(out, 0, out=out)
+        return buffers[-1]
+
     def train_step(self, state, target_q):
+        state = np.asarray(state, dtype=self.dtype)
+        target_q = np.asarray(target_q, dtype=self.dtype)
+
         # 1. Forward Pass
         pred = self.forward(state)
         
@@ -61,34 +111,117 @@ class ManualModel:
         # So error is 0 everywhere except the action index.
         loss = np.mean(np.square(output_error))
 
-        # Store gradients to update later
-        grads_W = [None] * len(self.layers)
-        grads_b = [None] * len(self.biases)
+        grads_W, grads_b = self._backward(output_error)
+                
+        # 3. Update Weights
+        self._apply_gradients(grads_W, grads_b)
+            
+        return loss
+
+    def train_batch(self, states, actions, rewards, next_states, dones, gamma=0.9, weights=None,
+                    reduction='mean'):
+        # Batched Q-learning update: states/next_states (B, in), actions (B, out)
+        # one-hot or (B,) indices, rewards (B,), dones (B,). Targets for the whole batch come from
+        # a single forward pass over next_states, and the weights get one update
+        # with gradients averaged over the batch.
+        # reduction='sum' adds the per-sample gradients instead, so the update is
+        # as large as B separate train_step calls at the same lr (the old replay
+        # loop); 'mean' makes it as large as a single one.
+        # weights: optional (B,) importance-sampling weights (prioritized replay).
+        # The per-sample TD errors are kept in self.td_errors for priority updates.
+        states = np.asarray(states, dtype=self.dtype)
+        next_states = np.asarray(next_states, dtype=self.dtype)
+        rewards = np.asarray(rewards, dtype=self.dtype)
+        dones = np.asarray(dones, dtype=bool)
+        actions = np.asarray(actions)
+        action_idx = actions if actions.ndim == 1 else np.argmax(actions, axis=1)
+        rows = np.arange(len(states))
+
+        # 1. Q-targets: r + gamma * max Q(s') for non-terminal transitions
+        # (plain forward pass: replay batches below BATCH_SIZE come in every
+        # size, which would each get predict() buffers)
+        q_next = self.forward(next_states)
+        q_new = rewards + gamma * np.max(q_next, axis=1) * ~dones
+
+        # 2. Forward pass on states (this fills the activations used by backprop)
+        pred = self.forward(states)
+
+        # Error is 0 everywhere except the taken action, like train_step
+        self.td_errors = pred[rows, action_idx] - q_new
+        output_error = np.zeros_like(pred)
+        output_error[rows, action_idx] = self.td_errors
+        if weights is not None:
+            output_error *= np.asarray(weights, dtype=self.dtype).reshape(-1, 1)
+        loss = np.mean(np.square(output_error))
+
+        # 3. Backward pass with mean- or sum-reduced gradients and update
+        if reduction == 'mean':
+            output_error /= len(states)
+        elif reduction != 'sum':
+            raise ValueError(f"Unknown reduction: {reduction} (choose 'mean' or 'sum')")
+        grads_W, grads_b = self._backward(output_error)
+        self._apply_gradients(grads_W, grads_b)
+
+        return loss
+
+    def _apply_gradients(self, grads_W, grads_b):
+        # The optimizer updates the weight arrays in place
+        self.optimizer.step(self._params, grads_W + grads_b, self.lr)
+        self.n_updates += 1
+
+    def _backward(self, output_error):
+        # Backpropagate output_error through the activations of the last forward pass.
+        # Gradients are written into the preallocated buffers, which stay valid
+        # until the next backward pass.
+        grads_W = self._grads_W
+        grads_b = self._grads_b
         
-        # Backpropagate error
         delta = output_error
         
         # Loop backwards
         for i in reversed(range(len(self.layers))):
             input_to_layer = self.activations[i]
             
-            dW = np.dot(input_to_layer.T, delta)
-            db = np.sum(delta, axis=0, keepdims=True)
-            
-            grads_W[i] = dW
-            grads_b[i] = db
+            np.dot(input_to_layer.T, delta, out=grads_W[i])
+            np.sum(delta, axis=0, keepdims=True, out=grads_b[i])
             
             if i > 0:
                 error_prev = np.dot(delta, self.layers[i].T)
-                relu_deriv = (self.z_values[i-1] > 0).astype(float)
+                relu_deriv = (self.z_values[i-1] > 0).astype(self.dtype)
                 delta = error_prev * relu_deriv
-                
-        # 3. Update Weights
-        for i in range(len(self.layers)):
-            self.layers[i] -= self.lr * grads_W[i]
-            self.biases[i] -= self.lr * grads_b[i]
-            
-        return loss
+
+        return grads_W, grads_b
+
+    def state_dict(self):
+        # Weights as W1/b1, W2/b2... plus the optimizer state (moments and step
+        # count) under opt_* keys, so training resumes where it stopped.
+        # The arrays are the live parameters, not copies.
+        save_dict = {}
+        for i, (W, b) in enumerate(zip(self.layers, self.biases)):
+            save_dict[f'W{i+1}'] = W
+            save_dict[f'b{i+1}'] = b
+        save_dict['opt_name'] = np.array(self.optimizer.name)
+        for key, arr in self.optimizer.state_dict().items():
+            save_dict[f'opt_{key}'] = arr
+        return save_dict
+
+    def load_state_dict(self, data):
+        self.layers = []
+        self.biases = []
+
+        i = 1
+        while f'W{i}' in data:
+            self.layers.append(data[f'W{i}'].astype(self.dtype))
+            self.biases.append(data[f'b{i}'].astype(self.dtype))
+            i += 1
+        # Layer sizes may have changed; rebuild predict() buffers lazily
+        self._workspace = {}
+        self._bind_training_buffers()
+        if 'opt_name' in data and str(data['opt_name']) == self.optimizer.name:
+            self.optimizer.load_state_dict({key[4:]: data[key] for key in data
+                                            if key.startswith('opt_') and key != 'opt_name'})
+        elif 'opt_name' in data:
+            print(f"Saved optimizer state is for '{data['opt_name']}', starting {self.optimizer.name} fresh.")
 
     def save(self, file_name='model_weights.npz'):
         folder_path = './data'
@@ -97,13 +230,7 @@ class ManualModel:
         
         file_path = os.path.join(folder_path, file_name)
         
-        # Pack everything into a dictionary
-        save_dict = {}
-        for i, (W, b) in enumerate(zip(self.layers, self.biases)):
-            save_dict[f'W{i+1}'] = W
-            save_dict[f'b{i+1}'] = b
-            
-        np.savez(file_path, **save_dict)
+        np.savez(file_path, **self.state_dict())
         # print("Model saved!") 
 
     def load(self, file_name='model_weights.npz'):
@@ -111,15 +238,7 @@ class ManualModel:
         
         if os.path.exists(path):
             try:
-                data = np.load(path)
-                self.layers = []
-                self.biases = []
-                
-                i = 1
-                while f'W{i}' in data:
-                    self.layers.append(data[f'W{i}'])
-                    self.biases.append(data[f'b{i}'])
-                    i += 1
+                self.load_state_dict(np.load(path))
                 print(f"Model loaded successfully with {len(self.layers)} layers from {path}!")
                 return True
             except Exception as e:
@@ -1,7 +1,7 @@
 import numpy as np
 
 # Dosya yolunu tam olarak yaz
-path = './model/model.npy.npz' 
+path = './data/model_weights.npz'
 
 try:
     data = np.load(path)
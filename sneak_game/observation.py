@@ -0,0 +1,116 @@
+import numpy as np
+from game import Direction, BLOCK_SIZE
+
+# Observations returned by Agent.get_state and VecSnakeGame.get_states.
+#   'basic': the 11 binary features (danger straight/right/left, direction, food direction)
+#   'rich':  the basic features followed by, in the snake's own frame (everything
+#            turns with the heading):
+#            - 8 rays (straight ahead, then clockwise every 45 degrees), 3 values
+#              each: 1/distance to the wall, to the nearest body cell and to the
+#              food (0 when there is no body cell within RAY_LENGTH or the food is
+#              not on the ray)
+#            - the window x window cells around the head, 1 for body or off-board,
+#              without the head cell itself
+# Everything is read from the occupancy grid at fixed offsets from the head, so
+# the cost of a state depends on RAY_LENGTH and WINDOW, not on the board size or
+# the snake length.
+
+OBSERVATIONS = ('basic', 'rich')
+BASIC_FEATURES = 11
+N_RAYS = 8
+RAY_LENGTH = 16 # cells a body ray looks ahead (walls and food are found at any distance)
+WINDOW = 7 # odd; side of the local occupancy window
+
+# Directions in clockwise order, matching SnakeGameAI._move and vec_env
+CLOCK_WISE = [Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP]
+_DX = np.array([1, 0, -1, 0])
+_DY = np.array([0, 1, 0, -1])
+
+# Ray and window offsets as (forward, right) pairs in the snake's frame
+_RAYS = np.array([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+
+def _window_offsets(window):
+    half = window // 2
+    return np.array([(f, r) for f in range(half, -half - 1, -1) for r in range(-half, half + 1)
+                     if (f, r) != (0, 0)])
+
+def _to_board(offsets):
+    # (4, K, 2) board (dx, dy) steps of frame offsets for each heading
+    fwd = np.stack([_DX, _DY], axis=1)[:, None, :]
+    right = np.stack([np.roll(_DX, -1), np.roll(_DY, -1)], axis=1)[:, None, :]
+    return offsets[None, :, :1] * fwd + offsets[None, :, 1:] * right
+
+_RAY_STEPS = _to_board(_RAYS)
+_WINDOW_STEPS = {}
+
+def observation_size(observation='basic', window=WINDOW):
+    if observation not in OBSERVATIONS:
+        raise ValueError(f"Unknown observation: {observation} (choose from {OBSERVATIONS})")
+    if observation == 'basic':
+        return BASIC_FEATURES
+    return BASIC_FEATURES + 3 * N_RAYS + window * window - 1
+
+def observation_from_size(n_features):
+    # (observation, window) that produce n_features, e.g. for a saved model's input layer
+    if n_features == BASIC_FEATURES:
+        return 'basic', WINDOW
+    window = int(round(np.sqrt(n_features - BASIC_FEATURES - 3 * N_RAYS + 1)))
+    if window % 2 == 0 or observation_size('rich', window) != n_features:
+        raise ValueError(f"No observation has {n_features} features")
+    return 'rich', window
+
+def state_dtype(observation='basic'):
+    # Replay memory dtype: the basic features are bits, the rich ones fractions
+    return np.uint8 if observation == 'basic' else np.float32
+
+def rich_features(occupied, head_x, head_y, direction, food_x, food_y, window=WINDOW, ray_length=RAY_LENGTH):
+    # occupied: (N, rows, cols) bool; the others (N,) int arrays in cells, with
+    # direction as a clockwise index (0=right, 1=down, 2=left, 3=up).
+    # Returns the (N, 3 * N_RAYS + window * window - 1) float32 rich part.
+    n, rows, cols = occupied.shape
+    games = np.arange(n)[:, None, None]
+    steps = _RAY_STEPS[direction] # (N, 8, 2)
+    sx, sy = steps[..., 0], steps[..., 1]
+    x, y = head_x[:, None], head_y[:, None]
+
+    # Wall: steps until the ray leaves the board, per axis (at least 1, since
+    # the state after a wall collision has the head already off the board)
+    far = rows + cols
+    to_x = np.where(sx > 0, cols - x, np.where(sx < 0, x + 1, far))
+    to_y = np.where(sy > 0, rows - y, np.where(sy < 0, y + 1, far))
+    wall = 1.0 / np.maximum(np.minimum(to_x, to_y), 1)
+
+    # Body: first occupied cell among the next ray_length cells
+    t = np.arange(1, ray_length + 1)
+    xs = x[..., None] + sx[..., None] * t
+    ys = y[..., None] + sy[..., None] * t
+    inside = (xs >= 0) & (xs < cols) & (ys >= 0) & (ys < rows)
+    hits = inside & occupied[games, np.clip(ys, 0, rows - 1), np.clip(xs, 0, cols - 1)]
+    first = np.argmax(hits, axis=2)
+    body = np.where(hits.any(axis=2), 1.0 / (first + 1), 0.0)
+
+    # Food: on the ray when its offset is a positive multiple of the step
+    dx, dy = food_x[:, None] - x, food_y[:, None] - y
+    dist = np.where(sx != 0, dx * sx, dy * sy)
+    on_ray = ((dist > 0) & (dx == dist * sx) & (dy == dist * sy) & (food_x[:, None] >= 0))
+    food = np.where(on_ray, 1.0 / np.maximum(dist, 1), 0.0)
+
+    # Local window, off-board cells count as occupied
+    if window not in _WINDOW_STEPS:
+        _WINDOW_STEPS[window] = _to_board(_window_offsets(window))
+    steps = _WINDOW_STEPS[window][direction] # (N, K, 2)
+    wx = head_x[:, None] + steps[..., 0]
+    wy = head_y[:, None] + steps[..., 1]
+    inside = (wx >= 0) & (wx < cols) & (wy >= 0) & (wy < rows)
+    local = ~inside | occupied[games[:, :, 0], np.clip(wy, 0, rows - 1), np.clip(wx, 0, cols - 1)]
+
+    rays = np.stack([wall, body, food], axis=2).reshape(n, -1)
+    return np.concatenate([rays, local], axis=1).astype(np.float32)
+
+def game_rich_features(game, window=WINDOW):
+    # rich_features for one SnakeGameAI (pixel coordinates converted to cells)
+    return rich_features(game.occupied[None],
+                         np.array([int(game.head.x) // BLOCK_SIZE]), np.array([int(game.head.y) // BLOCK_SIZE]),
+                         np.array([CLOCK_WISE.index(game.direction)]),
+                         np.array([int(game.food.x) // BLOCK_SIZE]), np.array([int(game.food.y) // BLOCK_SIZE]),
+                         window)[0]
@@ -0,0 +1,129 @@
+import numpy as np
+
+class Optimizer:
+    # Base class: state arrays are allocated once in bind() with the shapes of
+    # the parameters, and step() updates parameters in place (out= style).
+    # The gradient arrays passed to step() are used as scratch space.
+    # clip_norm: optional maximum global L2 norm of the gradients.
+    name = 'sgd'
+    state_names = ()
+
+    def __init__(self, clip_norm=None):
+        self.clip_norm = clip_norm
+        self.t = 0
+        self.state = {}
+
+    def bind(self, params):
+        # (Re)allocate state for a list of parameter arrays
+        self.t = 0
+        self.state = {name: [np.zeros_like(p) for p in params] for name in self.state_names}
+        self.scratch = [np.empty_like(p) for p in params]
+
+    def step(self, params, grads, lr):
+        if self.clip_norm is not None:
+            norm = np.sqrt(sum(np.vdot(g, g) for g in grads))
+            if norm > self.clip_norm:
+                for g in grads:
+                    g *= self.clip_norm / norm
+        self.t += 1
+        for i, (p, g) in enumerate(zip(params, grads)):
+            self._update(i, p, g, lr)
+
+    def _update(self, i, p, g, lr):
+        # Plain SGD: p -= lr * g
+        np.multiply(g, lr, out=g)
+        p -= g
+
+    def state_dict(self):
+        d = {'t': np.array(self.t)}
+        for name, arrays in self.state.items():
+            for i, arr in enumerate(arrays):
+                d[f'{name}{i}'] = arr
+        return d
+
+    def load_state_dict(self, d):
+        self.t = int(d['t'])
+        for name, arrays in self.state.items():
+            for i, arr in enumerate(arrays):
+                arr[...] = d[f'{name}{i}']
+
+class SGD(Optimizer):
+    pass
+
+class Momentum(Optimizer):
+    # v = mu * v + g; p -= lr * v
+    name = 'momentum'
+    state_names = ('v',)
+
+    def __init__(self, mu=0.9, clip_norm=None):
+        super().__init__(clip_norm)
+        self.mu = mu
+
+    def _update(self, i, p, g, lr):
+        v = self.state['v'][i]
+        v *= self.mu
+        v += g
+        np.multiply(v, lr, out=g)
+        p -= g
+
+class RMSProp(Optimizer):
+    # s = rho * s + (1 - rho) * g^2; p -= lr * g / (sqrt(s) + eps)
+    name = 'rmsprop'
+    state_names = ('s',)
+
+    def __init__(self, rho=0.9, eps=1e-8, clip_norm=None):
+        super().__init__(clip_norm)
+        self.rho = rho
+        self.eps = eps
+
+    def _update(self, i, p, g, lr):
+        s, tmp = self.state['s'][i], self.scratch[i]
+        np.multiply(g, g, out=tmp)
+        tmp *= 1 - self.rho
+        s *= self.rho
+        s += tmp
+        np.sqrt(s, out=tmp)
+        tmp += self.eps
+        np.divide(g, tmp, out=tmp)
+        tmp *= lr
+        p -= tmp
+
+class Adam(Optimizer):
+    # Adam with bias correction folded into the step size:
+    # p -= lr_t * m / (sqrt(v) + eps_t), lr_t = lr * sqrt(1 - b2^t) / (1 - b1^t)
+    name = 'adam'
+    state_names = ('m', 'v')
+
+    def __init__(self, beta1=0.9, beta2=0.999, eps=1e-8, clip_norm=None):
+        super().__init__(clip_norm)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+
+    def _update(self, i, p, g, lr):
+        m, v, tmp = self.state['m'][i], self.state['v'][i], self.scratch[i]
+        m *= self.beta1
+        np.multiply(g, 1 - self.beta1, out=tmp)
+        m += tmp
+        np.multiply(g, g, out=tmp)
+        tmp *= 1 - self.beta2
+        v *= self.beta2
+        v += tmp
+
+        correction = np.sqrt(1 - self.beta2 ** self.t)
+        lr_t = lr * correction / (1 - self.beta1 ** self.t)
+        np.sqrt(v, out=tmp)
+        tmp += self.eps * correction
+        np.divide(m, tmp, out=tmp)
+        tmp *= lr_t
+        p -= tmp
+
+OPTIMIZERS = {cls.name: cls for cls in (SGD, Momentum, RMSProp, Adam)}
+
+def make_optimizer(optimizer, clip_norm=None):
+    # Accepts an Optimizer instance or one of the names in OPTIMIZERS
+    if isinstance(optimizer, Optimizer):
+        return optimizer
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer: {optimizer} (choose from {sorted(OPTIMIZERS)})")
+    return OPTIMIZERS[optimizer](clip_norm=clip_norm)
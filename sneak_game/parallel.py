@@ -0,0 +1,231 @@
+import os
+import time
+import queue
+import random
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from game import SnakeGameAI, BLOCK_SIZE
+from model import ManualModel
+from replay import ReplayBuffer
+from logger import TrainingLogger, last_logged_game
+from observation import observation_size, state_dtype
+from agent import Agent, MAX_MEMORY, BATCH_SIZE, LR, GAMMA, HIDDEN_SIZES, OPTIMIZER, GRAD_CLIP, RESUME
+from agent import LOG_FORMAT, GRID_CELLS, OBSERVATION, WINDOW
+
+# Parallel Training Control
+NUM_WORKERS = max(1, (os.cpu_count() or 2) - 1) # one core is left for the learner
+SYNC_EVERY = 20 # learner updates between weight broadcasts
+RING_CAPACITY = 20_000 # transitions per worker ring buffer
+N_FEATURES = observation_size(OBSERVATION, WINDOW) # states come from Agent.get_state
+
+def worker_epsilons(n_workers, base=0.4, alpha=7):
+    # Ape-X style spread: worker 0 explores most, the last worker is nearly greedy
+    if n_workers == 1:
+        return [base]
+    return [base ** (1 + alpha * i / (n_workers - 1)) for i in range(n_workers)]
+
+class SharedArrays:
+    # Named NumPy arrays backed by multiprocessing.shared_memory blocks.
+    # The learner creates them; workers attach by passing spec() to the child.
+    def __init__(self, layout, create=True, names=None):
+        self.layout = layout
+        self.blocks = {}
+        self.arrays = {}
+        for key, (shape, dtype) in layout.items():
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if create:
+                shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            else:
+                shm = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = shm
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            if create:
+                self.arrays[key][...] = 0
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def spec(self):
+        return self.layout, {key: shm.name for key, shm in self.blocks.items()}
+
+    @classmethod
+    def attach(cls, spec):
+        layout, names = spec
+        return cls(layout, create=False, names=names)
+
+    def close(self, unlink=False):
+        self.arrays = {}
+        for shm in self.blocks.values():
+            shm.close()
+            if unlink:
+                shm.unlink()
+
+def _layout(n_workers, capacity, model):
+    # Per-worker single-producer rings plus one flat weight vector.
+    # 'written' counts transitions ever written by each worker; the slot of
+    # transition t is t % capacity.
+    n_params = sum(W.size + b.size for W, b in zip(model.layers, model.biases))
+    return {
+        'states': ((n_workers, capacity, N_FEATURES), state_dtype(OBSERVATION)),
+        'actions': ((n_workers, capacity), np.int8),
+        'rewards': ((n_workers, capacity), np.float32),
+        'next_states': ((n_workers, capacity, N_FEATURES), state_dtype(OBSERVATION)),
+        'dones': ((n_workers, capacity), bool),
+        'written': ((n_workers,), np.int64),
+        'weights': ((n_params,), np.float64),
+        'version': ((1,), np.int64),
+    }
+
+def _publish_weights(model, shared, lock):
+    with lock:
+        flat = shared['weights']
+        i = 0
+        for W, b in zip(model.layers, model.biases):
+            for arr in (W, b):
+                flat[i:i + arr.size] = arr.ravel()
+                i += arr.size
+        shared['version'][0] += 1
+
+def _pull_weights(model, shared, lock):
+    with lock:
+        flat = shared['weights']
+        i = 0
+        for W, b in zip(model.layers, model.biases):
+            for arr in (W, b):
+                arr[...] = flat[i:i + arr.size].reshape(arr.shape)
+                i += arr.size
+        return int(shared['version'][0])
+
+def _worker(wid, epsilon, seed, spec, capacity, stop_event, lock, episode_queue):
+    # Plays headless games with a local copy of the model and streams every
+    # transition into its own ring buffer; weights are refreshed between games.
+    random.seed(seed)
+    np.random.seed(seed)
+    shared = SharedArrays.attach(spec)
+    model = ManualModel(N_FEATURES, HIDDEN_SIZES, 3, LR, optimizer=OPTIMIZER, clip_norm=GRAD_CLIP)
+    version = _pull_weights(model, shared, lock)
+    game = SnakeGameAI(GRID_CELLS[0] * BLOCK_SIZE, GRID_CELLS[1] * BLOCK_SIZE, headless=True)
+    written = 0
+    game_steps = 0
+
+    try:
+        while not stop_event.is_set():
+            state = Agent.get_state(game)
+            if random.random() < epsilon:
+                move = random.randint(0, 2)
+            else:
+                move = int(np.argmax(model.predict(state)))
+            final_move = [0, 0, 0]
+            final_move[move] = 1
+
+            reward, done, score, _, death_reason = game.play_step(final_move)
+            state_new = Agent.get_state(game)
+            game_steps += 1
+
+            slot = written % capacity
+            shared['states'][wid, slot] = state
+            shared['actions'][wid, slot] = move
+            shared['rewards'][wid, slot] = reward
+            shared['next_states'][wid, slot] = state_new
+            shared['dones'][wid, slot] = done
+            written += 1
+            # Publish the slot only after it is fully written
+            shared['written'][wid] = written
+
+            if done:
+                episode_queue.put((wid, score, game_steps, death_reason))
+                game.reset()
+                game_steps = 0
+                if shared['version'][0] != version:
+                    version = _pull_weights(model, shared, lock)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Do not block process exit on episodes the learner will never read
+        episode_queue.cancel_join_thread()
+        shared.close()
+
+def _drain_rings(shared, read, capacity, memory):
+    # Move everything the workers wrote since the last call into the replay
+    # memory. A worker that lapped its ring loses its oldest transitions.
+    new = 0
+    for wid in range(len(read)):
+        written = int(shared['written'][wid])
+        start = max(read[wid], written - capacity)
+        n = written - start
+        if n == 0:
+            continue
+        idx = (start + np.arange(n)) % capacity
+        memory.push_batch(shared['states'][wid, idx], shared['actions'][wid, idx],
+                          shared['rewards'][wid, idx], shared['next_states'][wid, idx],
+                          shared['dones'][wid, idx])
+        read[wid] = written
+        new += n
+    return new
+
+def train_parallel(n_workers=NUM_WORKERS, sync_every=SYNC_EVERY, capacity=RING_CAPACITY, max_games=None):
+    model = ManualModel(N_FEATURES, HIDDEN_SIZES, 3, LR, optimizer=OPTIMIZER, clip_norm=GRAD_CLIP)
+    if RESUME:
+        model.load('model_weights.npz')
+    memory = ReplayBuffer(MAX_MEMORY, N_FEATURES, state_dtype=state_dtype(OBSERVATION))
+    logger = TrainingLogger('./data', fmt=LOG_FORMAT,
+                            board_size=(GRID_CELLS[0] * BLOCK_SIZE, GRID_CELLS[1] * BLOCK_SIZE))
+
+    ctx = mp.get_context()
+    shared = SharedArrays(_layout(n_workers, capacity, model))
+    lock = ctx.Lock()
+    stop_event = ctx.Event()
+    episode_queue = ctx.Queue()
+    _publish_weights(model, shared, lock)
+
+    workers = []
+    for wid, epsilon in enumerate(worker_epsilons(n_workers)):
+        p = ctx.Process(target=_worker, daemon=True,
+                        args=(wid, epsilon, wid, shared.spec(), capacity, stop_event, lock, episode_queue))
+        p.start()
+        workers.append(p)
+    print(f"Started {n_workers} workers, epsilons: {[round(e, 4) for e in worker_epsilons(n_workers)]}")
+
+    read = [0] * n_workers
+    # Continue the game numbering of the logs, so Game_No keeps increasing
+    start = n_games = last_logged_game('./data')
+    record = 0
+    updates = 0
+    try:
+        while max_games is None or n_games - start < max_games:
+            _drain_rings(shared, read, capacity, memory)
+
+            while True:
+                try:
+                    wid, score, game_steps, death_reason = episode_queue.get_nowait()
+                except queue.Empty:
+                    break
+                n_games += 1
+                if score > record:
+                    record = score
+                    model.save()
+                print(f'Game: {n_games}, Worker: {wid}, Score: {score}, Record: {record}, Reason: {death_reason}')
+                logger.log_episode(n_games, score, record, game_steps / (score + 1), death_reason)
+
+            if len(memory) < BATCH_SIZE:
+                time.sleep(0.001)
+                continue
+
+            states, actions, rewards, next_states, dones = memory.sample(BATCH_SIZE)
+            model.train_batch(states, actions, rewards, next_states, dones, GAMMA)
+            updates += 1
+            if updates % sync_every == 0:
+                _publish_weights(model, shared, lock)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        for p in workers:
+            p.join(timeout=5)
+        logger.close()
+        shared.close(unlink=True)
+    return model
+
+if __name__ == '__main__':
+    train_parallel()
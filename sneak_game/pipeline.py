@@ -0,0 +1,105 @@
+import threading
+from contextlib import contextmanager
+from model import ManualModel
+from replay import PrioritizedReplayBuffer
+
+# In-process actor/learner pipelining (agent.PIPELINED). The training loop on
+# the main thread stays the actor: it plays with actor_model, a read-only copy
+# of the weights, and hands transitions to remember(). The LearnerThread runs
+# batched updates on agent.model from the replay memory meanwhile. The matrix
+# products release the GIL, so most of the training time overlaps gameplay.
+#
+# Every sync_every updates the learner publishes fresh copies of its weights;
+# sync() swaps them into actor_model by reference, so the actor never copies
+# and never sees a half-updated layer. steps_per_update caps the learner at
+# one batch per that many actor steps (0: as fast as it can), which keeps the
+# replay ratio independent of how fast the game runs (e.g. with a frame cap).
+
+class LearnerThread(threading.Thread):
+    def __init__(self, agent, batch_size=1000, sync_every=10, steps_per_update=10):
+        super().__init__(name='learner', daemon=True)
+        self.agent = agent
+        self.batch_size = batch_size
+        self.sync_every = max(1, sync_every)
+        self.steps_per_update = steps_per_update
+        self.prioritized = isinstance(agent.memory, PrioritizedReplayBuffer)
+        self.model_lock = threading.Lock() # held for each update
+        self.memory_cond = threading.Condition() # guards agent.memory and the counters below
+        self.actor_steps = 0
+        self.updates = 0
+        self.stopping = False
+        self.error = None
+        self.published = None
+        self._publish()
+
+        # Layer sizes come from the published weights (predict() buffers are
+        # allocated on first use, after the swap)
+        self.actor_model = ManualModel(1, [], 1, dtype=agent.model.dtype)
+        self.actor_model.n_updates = -1
+        self.sync(self.actor_model)
+
+    def remember(self, state, action, reward, next_state, done):
+        with self.memory_cond:
+            self.agent.memory.push(state, action, reward, next_state, done)
+            self.actor_steps += 1
+            self.memory_cond.notify()
+
+    def sync(self, model):
+        # Swap the newest published weights into the actor's model; the
+        # update count doubles as n_updates so a PolicyCache on it refreshes
+        if self.error is not None:
+            raise RuntimeError("Learner thread failed") from self.error
+        n_updates, layers, biases = self.published
+        if model.n_updates != n_updates:
+            model.layers, model.biases, model.n_updates = layers, biases, n_updates
+
+    def _publish(self):
+        model = self.agent.model
+        self.published = (model.n_updates, [W.copy() for W in model.layers], [b.copy() for b in model.biases])
+
+    @contextmanager
+    def paused(self):
+        # Model and memory stay unchanged inside (used for checkpoints)
+        with self.model_lock, self.memory_cond:
+            yield
+
+    def stop(self):
+        with self.memory_cond:
+            self.stopping = True
+            self.memory_cond.notify_all()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        try:
+            while self._update():
+                pass
+        except Exception as e:
+            self.error = e
+            raise
+
+    def _update(self):
+        agent = self.agent
+        with self.memory_cond:
+            while not self.stopping and (len(agent.memory) == 0 or
+                                         self.actor_steps < (self.updates + 1) * self.steps_per_update):
+                self.memory_cond.wait()
+            if self.stopping:
+                return False
+            batch = agent.memory.sample(self.batch_size)
+
+        with self.model_lock:
+            if self.prioritized:
+                states, actions, rewards, next_states, dones, idx, weights = batch
+                agent.model.train_batch(states, actions, rewards, next_states, dones, agent.gamma, weights)
+                td_errors = agent.model.td_errors.copy()
+            else:
+                agent.model.train_batch(*batch, agent.gamma)
+            self.updates += 1
+            if self.updates % self.sync_every == 0:
+                self._publish()
+
+        if self.prioritized:
+            with self.memory_cond:
+                agent.memory.update_priorities(idx, td_errors)
+        return True
@@ -0,0 +1,47 @@
+import numpy as np
+
+class PolicyCache:
+    # Agent.get_state yields 11 binary features, so the model only ever sees
+    # 2^11 = 2048 distinct inputs. This evaluates all of them in one batched
+    # predict() and answers action queries by indexing the resulting table.
+    # The table is rebuilt lazily on the first query after refresh_every weight
+    # updates (ManualModel.n_updates); refresh_every=1 keeps it exact.
+    # Call invalidate() after replacing the weights by other means (e.g. load()).
+    def __init__(self, model, n_features=11, refresh_every=1):
+        if n_features > 20:
+            raise ValueError(f"{n_features} binary features give too many states to tabulate")
+        self.model = model
+        self.refresh_every = refresh_every
+        # Feature 0 is the most significant bit of the packed index
+        self.bit_weights = 1 << np.arange(n_features - 1, -1, -1)
+        self.all_states = ((np.arange(2 ** n_features)[:, None] & self.bit_weights) > 0).astype(np.uint8)
+        self.q_table = None
+        self.actions = None
+        self.refreshed_at = None
+
+    def invalidate(self):
+        self.refreshed_at = None
+
+    def is_stale(self):
+        return (self.refreshed_at is None
+                or self.model.n_updates - self.refreshed_at >= self.refresh_every)
+
+    def refresh(self):
+        self.q_table = self.model.predict(self.all_states).copy()
+        self.actions = np.argmax(self.q_table, axis=1)
+        self.refreshed_at = self.model.n_updates
+
+    def index(self, states):
+        # Packed state index: a scalar for one (11,) state, an (N,) array for (N, 11)
+        return np.asarray(states) @ self.bit_weights
+
+    def q_values(self, states):
+        if self.is_stale():
+            self.refresh()
+        return self.q_table[self.index(states)]
+
+    def best_action(self, states):
+        # Greedy action index (0=straight, 1=right, 2=left) for one or many states
+        if self.is_stale():
+            self.refresh()
+        return self.actions[self.index(states)]
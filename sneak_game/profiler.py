@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import defaultdict, Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class NullProfiler:
+    # Stand-in used when profiling is off: every hook is an empty method call
+    def begin(self): pass
+    def lap(self, phase): pass
+    def step(self): pass
+    def update(self, n=1): pass
+    def game_done(self): pass
+    def close(self): pass
+
+class TrainingProfiler:
+    # Per-phase wall-clock timers and throughput counters for the training loop.
+    # begin() marks the start of a step and lap(name) charges the time since the
+    # previous mark to `name`. Every summary_seconds a summary (phase shares,
+    # steps/s, updates/s, games/min) is printed and appended to log_path as a
+    # JSON line; with metrics_port set, the latest summary is also served as
+    # JSON on http://127.0.0.1:<port>/.
+    # capture='cprofile' or 'sample' profiles games [capture_after, capture_after + capture_games)
+    # and writes the report next to log_path.
+    def __init__(self, summary_seconds=30, log_path='./data/profile_log.jsonl', metrics_port=None,
+                 capture=None, capture_after=0, capture_games=10):
+        if capture not in (None, 'cprofile', 'sample'):
+            raise ValueError(f"Unknown capture mode: {capture}")
+        self.summary_seconds = summary_seconds
+        self.log_path = log_path
+        self.capture = capture
+        self.capture_after = capture_after
+        self.capture_games = capture_games
+        self.capturing = None
+
+        self.phase_totals = defaultdict(float)
+        self.steps = self.updates = self.games = 0
+        self._mark = time.perf_counter()
+        self._window_start = self._mark
+        self._window_counts = (0, 0, 0)
+        self.last_summary = {}
+
+        folder = os.path.dirname(log_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.server = None
+        if metrics_port is not None:
+            self.server = _start_metrics_server(self, metrics_port)
+
+        if capture is not None and capture_after == 0:
+            self._start_capture()
+
+    def begin(self):
+        self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phase_totals[phase] += now - self._mark
+        self._mark = now
+
+    def step(self):
+        self.steps += 1
+        # Checking the clock only every 256 steps keeps the hook cheap
+        if self.steps & 255 == 0 and time.perf_counter() - self._window_start >= self.summary_seconds:
+            self.summary()
+
+    def update(self, n=1):
+        self.updates += n
+
+    def game_done(self):
+        self.games += 1
+        if self.capture is None:
+            return
+        if self.capturing is None and self.games == self.capture_after:
+            self._start_capture()
+        elif self.capturing is not None and self.games == self.capture_after + self.capture_games:
+            self._stop_capture()
+
+    def summary(self):
+        now = time.perf_counter()
+        elapsed = max(now - self._window_start, 1e-9)
+        steps0, updates0, games0 = self._window_counts
+        timed = sum(self.phase_totals.values()) or 1e-9
+        self.last_summary = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'steps': self.steps,
+            'games': self.games,
+            'steps_per_s': (self.steps - steps0) / elapsed,
+            'updates_per_s': (self.updates - updates0) / elapsed,
+            'games_per_min': (self.games - games0) * 60 / elapsed,
+            'phase_seconds': dict(self.phase_totals),
+            'phase_share': {k: v / timed for k, v in self.phase_totals.items()},
+        }
+        self._window_start = now
+        self._window_counts = (self.steps, self.updates, self.games)
+        self.phase_totals = defaultdict(float)
+
+        s = self.last_summary
+        shares = ', '.join(f'{k} {v:.0%}' for k, v in
+                           sorted(s['phase_share'].items(), key=lambda kv: -kv[1]))
+        print(f"[profile] {s['steps_per_s']:.0f} steps/s, {s['updates_per_s']:.0f} updates/s, "
+              f"{s['games_per_min']:.1f} games/min | {shares}")
+        with open(self.log_path, 'a') as f:
+            f.write(json.dumps(s) + '\n')
+        return s
+
+    def _report_path(self, suffix):
+        folder = os.path.dirname(self.log_path) or '.'
+        return os.path.join(folder, f'profile_games_{self.capture_after}-{self.games}.{suffix}')
+
+    def _start_capture(self):
+        if self.capture == 'cprofile':
+            self.capturing = cProfile.Profile()
+            self.capturing.enable()
+        else:
+            self.capturing = StackSampler(threading.get_ident())
+            self.capturing.start()
+
+    def _stop_capture(self):
+        if self.capture == 'cprofile':
+            self.capturing.disable()
+            path = self._report_path('prof')
+            self.capturing.dump_stats(path)
+            pstats.Stats(path).sort_stats('cumulative').print_stats(20)
+        else:
+            self.capturing.stop()
+            path = self._report_path('txt')
+            with open(path, 'w') as f:
+                f.write(self.capturing.report())
+        print(f"[profile] capture written to {path}")
+        self.capturing = None
+
+    def close(self):
+        if self.steps > self._window_counts[0]:
+            self.summary()
+        if self.capturing is not None:
+            self._stop_capture()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+class StackSampler(threading.Thread):
+    # Minimal sampling profiler: every `interval` seconds it looks at the target
+    # thread's current stack and counts the innermost frame (self time) and
+    # every function on the stack (cumulative time).
+    def __init__(self, thread_id, interval=0.001):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.self_counts = Counter()
+        self.cumulative_counts = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            code = frame.f_code
+            self.self_counts[f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}'] += 1
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = f'{os.path.basename(code.co_filename)}:{code.co_name}'
+                if key not in seen:
+                    seen.add(key)
+                    self.cumulative_counts[key] += 1
+                frame = frame.f_back
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def report(self, top=25):
+        n = max(self.samples, 1)
+        lines = [f'{self.samples} samples', '', 'Self (innermost frame):']
+        lines += [f'  {c / n:6.1%}  {k}' for k, c in self.self_counts.most_common(top)]
+        lines += ['', 'Cumulative (function anywhere on the stack):']
+        lines += [f'  {c / n:6.1%}  {k}' for k, c in self.cumulative_counts.most_common(top)]
+        return '\n'.join(lines) + '\n'
+
+def _start_metrics_server(profiler, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(profiler.last_summary).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,122 @@
+import pygame
+
+pygame.init()
+# Use system font to avoid missing file errors
+font = pygame.font.SysFont('arial', 25)
+
+# Constants
+SPEED = 60 # Optimized speed
+INCREMENTAL = True # redraw only the cells that changed instead of the whole board
+RENDER_EVERY = 1 # draw every Nth step (SPEED then caps drawn frames, not game steps)
+WHITE = (255, 255, 255)
+RED = (200, 0, 0)
+BLUE1 = (0, 0, 255)
+BLUE2 = (0, 100, 255)
+BLACK = (0, 0, 0)
+
+class PygameRenderer:
+    # Observer attached to a SnakeGameAI; the game calls render() after every step.
+    # With incremental=True only the cells that differ from the last drawn frame
+    # (new head cells, vacated tail cells, old and new food) are redrawn and
+    # pushed with pygame.display.update(rects); the score text is rendered once
+    # per (score, game) and only redrawn when it changes or something moves under it.
+    def __init__(self, w, h, block_size=20, speed=SPEED, incremental=INCREMENTAL, render_every=RENDER_EVERY):
+        self.w = w
+        self.h = h
+        self.block_size = block_size
+        self.speed = speed
+        self.incremental = incremental
+        self.render_every = max(1, render_every)
+        self.display = pygame.display.set_mode((self.w, self.h))
+        pygame.display.set_caption('Snake AI')
+        self.clock = pygame.time.Clock()
+        self.frame = 0
+        self._drawn_snake = None # cells on screen; None forces a full redraw
+        self._drawn_food = None
+        self._text_key = None # (score, game) of the cached text surface
+        self._text_drawn = None # (score, game) of the text on screen
+        self._text = None
+        self._text_rect = pygame.Rect(0, 0, 0, 0)
+
+    def render(self, game, game_no):
+        self.frame += 1
+        if self.frame % self.render_every:
+            return
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                quit()
+
+        if self.incremental and self._drawn_snake is not None:
+            self._update_changed(game, game_no)
+        else:
+            self._update_ui(game, game_no)
+        # speed=0 disables the frame cap (watch at full training speed)
+        if self.speed:
+            self.clock.tick(self.speed)
+
+    def _cell_rect(self, pt):
+        return pygame.Rect(pt.x, pt.y, self.block_size, self.block_size)
+
+    def _draw_segment(self, pt):
+        bs = self.block_size
+        pygame.draw.rect(self.display, BLUE1, pygame.Rect(pt.x, pt.y, bs, bs))
+        pygame.draw.rect(self.display, BLUE2, pygame.Rect(pt.x+4, pt.y+4, bs-8, bs-8))
+
+    def _score_text(self, game, game_no):
+        key = (game.score, game_no)
+        if key != self._text_key:
+            self._text_key = key
+            self._text = font.render(f"Score: {game.score} | Game: {game_no}", True, WHITE)
+        return self._text
+
+    def _update_ui(self, game, game_no):
+        # Full redraw
+        self.display.fill(BLACK)
+        for pt in game.snake:
+            self._draw_segment(pt)
+        pygame.draw.rect(self.display, RED, self._cell_rect(game.food))
+        text = self._score_text(game, game_no)
+        self._text_rect = self.display.blit(text, [0, 0])
+        self._text_drawn = self._text_key
+        pygame.display.flip()
+        self._drawn_snake = set(game.snake)
+        self._drawn_food = game.food
+
+    def _update_changed(self, game, game_no):
+        snake = set(game.snake)
+        added = snake - self._drawn_snake
+        removed = self._drawn_snake - snake
+        dirty = []
+
+        for pt in removed:
+            dirty.append(self.display.fill(BLACK, self._cell_rect(pt)))
+        if game.food != self._drawn_food:
+            if self._drawn_food not in snake:
+                dirty.append(self.display.fill(BLACK, self._cell_rect(self._drawn_food)))
+            pygame.draw.rect(self.display, RED, self._cell_rect(game.food))
+            dirty.append(self._cell_rect(game.food))
+        for pt in added:
+            self._draw_segment(pt)
+            dirty.append(self._cell_rect(pt))
+
+        # The text is drawn over the board: when it changes or a cell under it
+        # changed, rebuild that area from the board and blit the text on top
+        text = self._score_text(game, game_no)
+        text_area = self._text_rect.union(text.get_rect())
+        if self._text_key != self._text_drawn or text_area.collidelist(dirty) != -1:
+            self.display.fill(BLACK, text_area)
+            for pt in game.snake:
+                if text_area.colliderect(self._cell_rect(pt)):
+                    self._draw_segment(pt)
+            if text_area.colliderect(self._cell_rect(game.food)):
+                pygame.draw.rect(self.display, RED, self._cell_rect(game.food))
+            self._text_rect = self.display.blit(text, [0, 0])
+            self._text_drawn = self._text_key
+            dirty.append(text_area)
+
+        if dirty:
+            pygame.display.update(dirty)
+        self._drawn_snake = snake
+        self._drawn_food = game.food
@@ -0,0 +1,257 @@
+import numpy as np
+import os
+
+class ReplayBuffer:
+    # Fixed-size ring buffer of transitions stored in preallocated arrays.
+    # States are binary features, so they fit in uint8 (pass state_dtype=np.float32
+    # for the rich observation); actions are stored as indices (0=straight,
+    # 1=right, 2=left) instead of one-hot lists.
+    # With mmap_dir set, the arrays live in .npy files opened with np.memmap,
+    # so the buffer survives restarts once flush() has been called.
+    # Sampling uses its own generator; without a seed it is seeded from the
+    # global NumPy RNG, so np.random.seed() makes a run reproducible.
+    def __init__(self, capacity, state_size=11, mmap_dir=None, seed=None, state_dtype=np.uint8):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.mmap_dir = mmap_dir
+        if seed is None:
+            seed = np.random.randint(2**32, dtype=np.int64)
+        self.rng = np.random.default_rng(seed)
+        self.pos = 0
+        self.size = 0
+
+        if mmap_dir is not None and not os.path.exists(mmap_dir):
+            os.makedirs(mmap_dir)
+        # Cleared by _alloc if any existing memmap file has to be recreated
+        self._reused = mmap_dir is not None
+
+        self.states = self._alloc('states', (capacity, state_size), state_dtype)
+        self.actions = self._alloc('actions', (capacity,), np.int8)
+        self.rewards = self._alloc('rewards', (capacity,), np.float32)
+        self.next_states = self._alloc('next_states', (capacity, state_size), state_dtype)
+        self.dones = self._alloc('dones', (capacity,), bool)
+
+        if self._reused:
+            meta_path = os.path.join(mmap_dir, 'meta.npy')
+            if os.path.exists(meta_path):
+                self.pos, self.size = (int(v) for v in np.load(meta_path))
+
+    def _alloc(self, name, shape, dtype):
+        if self.mmap_dir is None:
+            return np.zeros(shape, dtype=dtype)
+
+        path = os.path.join(self.mmap_dir, f'{name}.npy')
+        if os.path.exists(path):
+            arr = np.load(path, mmap_mode='r+')
+            if arr.shape == shape and arr.dtype == dtype:
+                return arr
+        # Missing or incompatible file: start this buffer from scratch
+        self._reused = False
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state, action, reward, next_state, done):
+        # action may be a one-hot list (as produced by Agent.get_action) or an index
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action if np.isscalar(action) else np.argmax(action)
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        # Vectorized push for (B, ...) arrays, e.g. from VecSnakeGame
+        actions = np.asarray(actions)
+        if actions.ndim == 2:
+            actions = np.argmax(actions, axis=1)
+        idx = (self.pos + np.arange(len(actions))) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.pos = int((self.pos + len(actions)) % self.capacity)
+        self.size = min(self.size + len(actions), self.capacity)
+
+    def sample(self, batch_size):
+        # Returns contiguous (states, actions, rewards, next_states, dones) arrays.
+        # Like the old deque version, the whole buffer is returned while it
+        # holds no more than batch_size transitions.
+        if self.size <= batch_size:
+            idx = np.arange(self.size)
+        else:
+            idx = self.rng.integers(0, self.size, size=batch_size)
+        return self._gather(idx)
+
+    def _gather(self, idx):
+        return (self.states[idx], self.actions[idx], self.rewards[idx],
+                self.next_states[idx], self.dones[idx])
+
+    def flush(self):
+        # Persist a memory-mapped buffer (no-op for in-memory buffers)
+        if self.mmap_dir is None:
+            return
+        for arr in (self.states, self.actions, self.rewards, self.next_states, self.dones):
+            arr.flush()
+        np.save(os.path.join(self.mmap_dir, 'meta.npy'), np.array([self.pos, self.size]))
+
+    def state_dict(self):
+        # Only the filled part, in insertion order (oldest first); the arrays are copies
+        order = (self.pos - self.size + np.arange(self.size)) % self.capacity
+        return {'states': self.states[order], 'actions': self.actions[order],
+                'rewards': self.rewards[order], 'next_states': self.next_states[order],
+                'dones': self.dones[order]}
+
+    def load_state_dict(self, data):
+        # Keep the newest transitions if data holds more than capacity
+        start = max(len(data['actions']) - self.capacity, 0)
+        self.pos = 0
+        self.size = 0
+        self.push_batch(data['states'][start:], data['actions'][start:], data['rewards'][start:],
+                        data['next_states'][start:], data['dones'][start:])
+
+    def save(self, file_name='replay_memory.npz'):
+        folder_path = './data'
+        if not os.path.exists(folder_path):
+            os.makedirs(folder_path)
+
+        file_path = os.path.join(folder_path, file_name)
+        np.savez(file_path, **self.state_dict())
+
+    def load(self, file_name='replay_memory.npz'):
+        path = f'./data/{file_name}'
+
+        if not os.path.exists(path):
+            print(f"No replay memory found at {path}, starting empty.")
+            return False
+        try:
+            self.load_state_dict(np.load(path))
+            print(f"Replay memory loaded with {self.size} transitions from {path}!")
+            return True
+        except Exception as e:
+            print(f"Error loading replay memory: {e}")
+            return False
+
+class SumTree:
+    # Binary tree over a power-of-two number of leaves, stored in one array:
+    # node i has children 2i and 2i+1, the root is node 1 and leaf j is node
+    # n_leaves + j. Each node holds the sum of the priorities below it, so
+    # sampling proportionally to priority and updating a priority are O(log n).
+    # Both operations work on whole batches of indices, one tree level at a time.
+    def __init__(self, capacity):
+        self.n_leaves = 2
+        while self.n_leaves < capacity:
+            self.n_leaves *= 2
+        self.tree = np.zeros(2 * self.n_leaves)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, idx):
+        return self.tree[np.asarray(idx) + self.n_leaves]
+
+    def update(self, idx, priorities):
+        nodes = np.asarray(idx) + self.n_leaves
+        if len(nodes) == 0:
+            return
+        self.tree[nodes] = priorities
+        while True:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+
+    def set(self, i, priority):
+        # Scalar version of update() for single pushes
+        node = i + self.n_leaves
+        self.tree[node] = priority
+        node //= 2
+        while node >= 1:
+            self.tree[node] = self.tree[2 * node] + self.tree[2 * node + 1]
+            node //= 2
+
+    def find(self, values):
+        # Leaf index for each value in [0, total), descending from the root
+        values = np.array(values, dtype=float)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.n_leaves:
+            left = 2 * nodes
+            go_right = values > self.tree[left]
+            values = np.where(go_right, values - self.tree[left], values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.n_leaves
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    # Proportional prioritized replay: transitions are sampled with probability
+    # p^alpha / sum(p^alpha), where p is the last absolute TD error, and come with
+    # importance-sampling weights (N * P)^-beta normalised by their maximum.
+    # New transitions get the current maximum priority so they are replayed at
+    # least once; beta is annealed towards 1 over beta_steps sample calls.
+    def __init__(self, capacity, state_size=11, alpha=0.6, beta=0.4, beta_steps=100_000,
+                 eps=1e-3, mmap_dir=None, seed=None, state_dtype=np.uint8):
+        self.tree = SumTree(capacity)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = (1.0 - beta) / beta_steps
+        self.eps = eps
+        self.max_priority = 1.0
+        super().__init__(capacity, state_size, mmap_dir, seed, state_dtype)
+        if self.size > 0:
+            # Transitions reopened from a memmap start at the maximum priority
+            self.tree.update(np.arange(self.size), self.max_priority ** self.alpha)
+
+    def push(self, state, action, reward, next_state, done):
+        i = self.pos
+        super().push(state, action, reward, next_state, done)
+        self.tree.set(i, self.max_priority ** self.alpha)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        idx = (self.pos + np.arange(len(dones))) % self.capacity
+        super().push_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(idx, self.max_priority ** self.alpha)
+
+    def sample(self, batch_size):
+        # Returns (states, actions, rewards, next_states, dones, idx, weights);
+        # pass weights to ManualModel.train_batch and idx to update_priorities
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        if self.size <= batch_size:
+            idx = np.arange(self.size)
+            return self._gather(idx) + (idx, np.ones(self.size))
+
+        # Stratified sampling: one value from each of batch_size equal segments
+        total = self.tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        idx = np.minimum(self.tree.find(values), self.size - 1)
+
+        probs = self.tree.get(idx) / total
+        weights = (self.size * probs) ** -self.beta
+        weights /= weights.max()
+        return self._gather(idx) + (idx, weights)
+
+    def state_dict(self):
+        # Adds the priorities (same oldest-first order) and the annealing state
+        d = super().state_dict()
+        order = (self.pos - self.size + np.arange(self.size)) % self.capacity
+        d['priorities'] = self.tree.get(order)
+        d['max_priority'] = np.array(self.max_priority)
+        d['beta'] = np.array(self.beta)
+        return d
+
+    def load_state_dict(self, data):
+        super().load_state_dict(data)
+        if 'priorities' in data:
+            start = max(len(data['actions']) - self.capacity, 0)
+            self.max_priority = float(data['max_priority'])
+            self.beta = float(data['beta'])
+            if self.size > 0:
+                self.tree.update(np.arange(self.size), data['priorities'][start:])
+
+    def update_priorities(self, idx, td_errors):
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(idx, priorities ** self.alpha)
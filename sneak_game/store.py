@@ -0,0 +1,200 @@
+import os
+import glob
+import numpy as np
+from logger import POSITION_DTYPE, EPISODE_DTYPE
+from vec_env import DEATH_REASONS
+
+# Indexed binary log store (LOG_FORMAT='store'). Everything is raw fixed-width
+# records appended to files in <log_dir>/store/, so any file can be opened with
+# np.memmap and a lookup only touches the pages it needs:
+#   positions_NNNNNN.bin  POSITION_DTYPE records; a new segment starts after SEGMENT_BYTES
+#   episodes.bin          EPISODE_DTYPE records, one per game
+#   index.bin             INDEX_DTYPE records: game Game_No has Count position
+#                         records at byte Offset of positions segment Segment
+#                         (a game split across two flushes has two entries)
+# episodes.bin and index.bin are sorted by Game_No and searched with a binary
+# search. Game numbers only grow within a run; a resumed run first cuts the
+# games logged after its checkpoint (truncate_store, via logger.truncate_logs),
+# and StoreWriter refuses appends that would go back. A record cut short by a
+# crash is ignored by readers and overwritten by the next append.
+
+INDEX_DTYPE = np.dtype([('Game_No', '<i4'), ('Segment', '<i4'), ('Offset', '<i8'), ('Count', '<i4')])
+SEGMENT_BYTES = 1 << 30
+
+def _append(path, records):
+    # Append after the last complete record, dropping a torn one if present
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    end = size - size % records.dtype.itemsize
+    with open(path, 'r+b' if size else 'wb') as f:
+        f.seek(end)
+        f.write(records.tobytes())
+        f.truncate()
+    return end
+
+def _memmap(path, dtype):
+    # Read-only view of the complete records of a file (empty array if none)
+    n = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(n,))
+
+class StoreWriter:
+    # Used by TrainingLogger(fmt='store'); append() receives each flushed batch
+    def __init__(self, log_dir='./data', segment_bytes=SEGMENT_BYTES):
+        self.folder = os.path.join(log_dir, 'store')
+        self.segment_bytes = segment_bytes
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        segments = sorted(glob.glob(os.path.join(self.folder, 'positions_*.bin')))
+        self.segment = len(segments) - 1 if segments else 0
+        episodes = _memmap(os.path.join(self.folder, 'episodes.bin'), EPISODE_DTYPE)
+        index = _memmap(os.path.join(self.folder, 'index.bin'), INDEX_DTYPE)
+        self.last_game = int(episodes['Game_No'][-1]) if len(episodes) else 0
+        self.last_position_game = int(index['Game_No'][-1]) if len(index) else 0
+
+    def _segment_path(self, segment):
+        return os.path.join(self.folder, f'positions_{segment:06d}.bin')
+
+    def append(self, positions, episodes):
+        # Positions first, then their index entries, then the episodes, so
+        # anything a reader finds in the index or episodes is already on disk
+        games = np.concatenate([[self.last_position_game], positions['Game_No']])
+        if (np.diff(games) < 0).any() or (np.diff(np.concatenate([[self.last_game], episodes['Game_No']])) <= 0).any():
+            raise ValueError(f"Game numbers in {self.folder} must increase; truncate the store "
+                             f"(logger.truncate_logs) before logging games again")
+        if len(positions):
+            path = self._segment_path(self.segment)
+            if os.path.exists(path) and os.path.getsize(path) + positions.nbytes > self.segment_bytes:
+                self.segment += 1
+                path = self._segment_path(self.segment)
+            offset = _append(path, positions)
+
+            games = positions['Game_No']
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(games)) + 1])
+            index = np.zeros(len(starts), dtype=INDEX_DTYPE)
+            index['Game_No'] = games[starts]
+            index['Segment'] = self.segment
+            index['Offset'] = offset + starts * POSITION_DTYPE.itemsize
+            index['Count'] = np.diff(np.append(starts, len(games)))
+            _append(os.path.join(self.folder, 'index.bin'), index)
+            self.last_position_game = int(games[-1])
+        if len(episodes):
+            _append(os.path.join(self.folder, 'episodes.bin'), episodes)
+            self.last_game = int(episodes['Game_No'][-1])
+
+def truncate_store(log_dir, n_games, n_positions=0):
+    # Drop everything logged after game n_games, except the first n_positions
+    # positions of game n_games + 1 (the game a checkpoint was taken in).
+    # Returns True if anything was removed.
+    folder = os.path.join(log_dir, 'store')
+    if not os.path.exists(folder):
+        return False
+    changed = False
+
+    path = os.path.join(folder, 'episodes.bin')
+    episodes = _memmap(path, EPISODE_DTYPE)
+    keep = int(np.searchsorted(episodes['Game_No'], n_games, side='right'))
+    del episodes
+    if os.path.exists(path) and os.path.getsize(path) != keep * EPISODE_DTYPE.itemsize:
+        os.truncate(path, keep * EPISODE_DTYPE.itemsize)
+        changed = True
+
+    # Index entries (and so positions) kept: all of games up to n_games, then
+    # game n_games + 1 up to n_positions records
+    path = os.path.join(folder, 'index.bin')
+    index = np.array(_memmap(path, INDEX_DTYPE))
+    keep = int(np.searchsorted(index['Game_No'], n_games, side='right'))
+    remaining = n_positions
+    while keep < len(index) and index['Game_No'][keep] == n_games + 1 and remaining > 0:
+        index['Count'][keep] = min(index['Count'][keep], remaining)
+        remaining -= index['Count'][keep]
+        keep += 1
+    index = index[:keep]
+    if os.path.exists(path) and (os.path.getsize(path) != index.nbytes
+                                 or not np.array_equal(index, _memmap(path, INDEX_DTYPE))):
+        with open(path, 'wb') as f:
+            f.write(index.tobytes())
+        changed = True
+
+    # Positions end where the last kept index entry ends
+    if len(index):
+        last_segment = int(index['Segment'][-1])
+        end = int(index['Offset'][-1]) + int(index['Count'][-1]) * POSITION_DTYPE.itemsize
+    else:
+        last_segment, end = 0, 0
+    for path in sorted(glob.glob(os.path.join(folder, 'positions_*.bin'))):
+        segment = int(os.path.basename(path)[len('positions_'):-len('.bin')])
+        if segment > last_segment:
+            os.remove(path)
+            changed = True
+        elif segment == last_segment and os.path.getsize(path) > end:
+            os.truncate(path, end)
+            changed = True
+    return changed
+
+class GameStore:
+    # Read side. Every call maps the files again, so data appended by a running
+    # trainer shows up without reopening the store.
+    def __init__(self, log_dir='./data'):
+        self.folder = os.path.join(log_dir, 'store')
+
+    def episodes(self):
+        # All episode records as a read-only memmap
+        return _memmap(os.path.join(self.folder, 'episodes.bin'), EPISODE_DTYPE)
+
+    def index(self):
+        return _memmap(os.path.join(self.folder, 'index.bin'), INDEX_DTYPE)
+
+    def games(self, first, last):
+        # Episode records of games first..last (inclusive)
+        episodes = self.episodes()
+        lo, hi = np.searchsorted(episodes['Game_No'], [first, last + 1])
+        return np.array(episodes[lo:hi])
+
+    def positions(self, first, last=None):
+        # Position records of games first..last (inclusive), read through the index
+        index = self.index()
+        last = first if last is None else last
+        lo, hi = np.searchsorted(index['Game_No'], [first, last + 1])
+        return self._read_positions(np.array(index[lo:hi]))
+
+    def positions_for(self, game_numbers):
+        # Position records of an arbitrary set of games (e.g. a query() result)
+        index = self.index()
+        game_numbers = np.unique(game_numbers)
+        lo = np.searchsorted(index['Game_No'], game_numbers)
+        hi = np.searchsorted(index['Game_No'], game_numbers, side='right')
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)]) if len(lo) else np.zeros(0, dtype=int)
+        return self._read_positions(np.array(index[rows]))
+
+    def _read_positions(self, entries):
+        if len(entries) == 0:
+            return np.zeros(0, dtype=POSITION_DTYPE)
+        parts = []
+        segments = {}
+        for segment, offset, count in zip(entries['Segment'], entries['Offset'], entries['Count']):
+            if segment not in segments:
+                path = os.path.join(self.folder, f'positions_{segment:06d}.bin')
+                segments[segment] = _memmap(path, POSITION_DTYPE)
+            start = offset // POSITION_DTYPE.itemsize
+            parts.append(segments[segment][start:start + count])
+        return np.concatenate(parts)
+
+    def query(self, first=None, last=None, death_reason=None, min_score=None, max_score=None):
+        # Episode records matching every given condition; death_reason is a
+        # name ('Collision_Wall', 'Collision_Self', 'Timeout') or a code
+        episodes = self.episodes()
+        if first is not None or last is not None:
+            game_no = episodes['Game_No']
+            lo = np.searchsorted(game_no, first) if first is not None else 0
+            hi = np.searchsorted(game_no, last + 1) if last is not None else len(episodes)
+            episodes = episodes[lo:hi]
+        mask = np.ones(len(episodes), dtype=bool)
+        if death_reason is not None:
+            code = DEATH_REASONS.index(death_reason) if isinstance(death_reason, str) else death_reason
+            mask &= episodes['Death_Reason'] == code
+        if min_score is not None:
+            mask &= episodes['Score'] >= min_score
+        if max_score is not None:
+            mask &= episodes['Score'] <= max_score
+        return np.array(episodes[mask])
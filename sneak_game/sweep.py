@@ -0,0 +1,193 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import random
+import itertools
+import statistics
+import contextlib
+import numpy as np
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Sweep Control
+# SPACE maps agent.py constants to candidate values. 'grid' runs every
+# combination; 'random' draws N_RANDOM configurations, picking from lists and
+# sampling ranges given as {'low': a, 'high': b} (add 'log': True for a
+# log-uniform range, e.g. learning rates). Ranges are only valid for 'random'.
+SEARCH = 'grid'
+SPACE = {
+    'LR': [0.001, 0.0003],
+    'GAMMA': [0.9, 0.95],
+    'HIDDEN_SIZES': [[256], [128, 128]],
+}
+N_RANDOM = 8
+MAX_GAMES = 300 # per-run budget in games
+MAX_SECONDS = None # optional per-run wall-time budget
+N_PROCESSES = max(1, os.cpu_count() or 1)
+SEED = 0
+SWEEP_DIR = './data/sweep' # one sub-folder per run plus results.csv
+# Early stopping: every REPORT_EVERY games a run reports its mean score over the
+# last WINDOW games. After GRACE_GAMES games, a run is stopped when that mean is
+# below STOP_FRACTION x the median of the runs that reached the same game count
+# (at least MIN_PEERS of them).
+EARLY_STOP = True
+REPORT_EVERY = 10
+WINDOW = 50
+GRACE_GAMES = 100
+MIN_PEERS = 3
+STOP_FRACTION = 0.5
+
+def grid_configs(space):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+def random_configs(space, n, seed=SEED):
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for key, values in space.items():
+            if isinstance(values, dict):
+                low, high = values['low'], values['high']
+                if values.get('log'):
+                    config[key] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                elif isinstance(low, int) and isinstance(high, int):
+                    config[key] = rng.randint(low, high)
+                else:
+                    config[key] = rng.uniform(low, high)
+            else:
+                config[key] = rng.choice(values)
+        configs.append(config)
+    return configs
+
+def _run_config(run_id, params, run_dir, seed, budget, report, progress, stop_flags):
+    # One headless training run in its own folder, with the swept agent.py
+    # constants overridden for the duration of the run
+    import agent
+    max_games, max_seconds = budget
+    report_every, window = report
+    overrides = dict(params, RESUME=False, PLOT_MODE='off')
+    saved = {key: getattr(agent, key) for key in overrides}
+    cwd = os.getcwd()
+    scores = []
+    outcome = ['budget']
+    start = time.perf_counter()
+
+    def on_game(n_games, score, record):
+        scores.append(score)
+        if max_seconds is not None and time.perf_counter() - start >= max_seconds:
+            outcome[0] = 'time'
+            return True
+        if n_games % report_every == 0:
+            progress.put((run_id, n_games, float(np.mean(scores[-window:]))))
+            if stop_flags.get(run_id, False):
+                outcome[0] = 'early_stop'
+                return True
+        return False
+
+    try:
+        for key, value in overrides.items():
+            setattr(agent, key, value)
+        os.makedirs(run_dir, exist_ok=True)
+        os.chdir(run_dir)
+        random.seed(seed)
+        np.random.seed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            steps = agent.train(headless=True, max_games=max_games, on_game=on_game, seed=seed)
+    finally:
+        os.chdir(cwd)
+        for key, value in saved.items():
+            setattr(agent, key, value)
+
+    return {
+        'run_id': run_id,
+        **{key: json.dumps(value) if isinstance(value, list) else value for key, value in params.items()},
+        'games': len(scores),
+        'steps': steps,
+        'seconds': round(time.perf_counter() - start, 2),
+        'mean_score': float(np.mean(scores)) if scores else 0.0,
+        'mean_last': float(np.mean(scores[-window:])) if scores else 0.0,
+        'record': max(scores, default=0),
+        'outcome': outcome[0],
+    }
+
+def _should_stop(run_id, n_games, mean, curves):
+    if n_games < GRACE_GAMES:
+        return False
+    peers = [curve[n_games] for other, curve in curves.items() if other != run_id and n_games in curve]
+    if len(peers) < MIN_PEERS:
+        return False
+    return mean < STOP_FRACTION * statistics.median(peers)
+
+def _drain_progress(progress, curves, stop_flags):
+    while not progress.empty():
+        run_id, n_games, mean = progress.get()
+        curves.setdefault(run_id, {})[n_games] = mean
+        if EARLY_STOP and not stop_flags.get(run_id, False) and _should_stop(run_id, n_games, mean, curves):
+            stop_flags[run_id] = True
+            print(f"  {run_id}: stopping at game {n_games} (mean {mean:.2f})")
+
+def run_sweep(search=SEARCH, space=SPACE, n_random=N_RANDOM, max_games=MAX_GAMES, max_seconds=MAX_SECONDS,
+              n_processes=N_PROCESSES, sweep_dir=SWEEP_DIR):
+    import agent
+    unknown = [key for key in space if not hasattr(agent, key)]
+    if unknown:
+        raise ValueError(f"Not agent.py constants: {unknown}")
+    if search == 'grid':
+        configs = grid_configs(space)
+    elif search == 'random':
+        configs = random_configs(space, n_random)
+    else:
+        raise ValueError(f"Unknown search: {search}")
+
+    sweep_dir = os.path.abspath(sweep_dir)
+    os.makedirs(sweep_dir, exist_ok=True)
+    print(f"Sweep: {len(configs)} runs on {n_processes} processes, budget {max_games} games"
+          + (f" / {max_seconds} s" if max_seconds is not None else ""))
+
+    ctx = mp.get_context()
+    with ctx.Manager() as manager:
+        progress = manager.Queue()
+        stop_flags = manager.dict()
+        curves = {}
+        results = []
+        with ProcessPoolExecutor(max_workers=n_processes, mp_context=ctx) as pool:
+            pending = set()
+            for i, params in enumerate(configs):
+                run_id = f'run_{i:03d}'
+                pending.add(pool.submit(_run_config, run_id, params, os.path.join(sweep_dir, run_id),
+                                        SEED + i, (max_games, max_seconds), (REPORT_EVERY, WINDOW),
+                                        progress, stop_flags))
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                _drain_progress(progress, curves, stop_flags)
+                for future in done:
+                    row = future.result()
+                    results.append(row)
+                    print(f"  {row['run_id']}: {row['outcome']} after {row['games']} games, "
+                          f"mean last {WINDOW} = {row['mean_last']:.2f}, record {row['record']}")
+
+    results.sort(key=lambda row: -row['mean_last'])
+    path = os.path.join(sweep_dir, 'results.csv')
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\nResults ({path}), best first:")
+    for row in results:
+        params = ', '.join(f'{key}={row[key]}' for key in space)
+        print(f"  {row['run_id']}  mean_last {row['mean_last']:6.2f}  record {row['record']:3d}  "
+              f"{row['games']:4d} games  {row['outcome']:10s}  {params}")
+    return results
+
+if __name__ == '__main__':
+    # Optional JSON spec overriding the constants above, e.g.
+    # {"SEARCH": "random", "SPACE": {"LR": {"low": 0.0001, "high": 0.003, "log": true}}, "N_RANDOM": 16}
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            globals().update(json.load(f))
+    run_sweep(SEARCH, SPACE, N_RANDOM, MAX_GAMES, MAX_SECONDS, N_PROCESSES, SWEEP_DIR)
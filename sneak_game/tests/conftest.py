@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The game modules import each other by plain name (run from sneak_game/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,37 @@
+import random
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import agent
+
+# Learning smoke test: with the default hyperparameters the agent scores ~30
+# per game after 150 headless games. A replay update that is much too weak
+# (or diverges) stays below 1, so the threshold is far from both.
+N_GAMES = 150
+MIN_MEAN_SCORE = 10 # mean of the last 50 games
+
+def _train_scores(n_games, monkeypatch):
+    # Scores of a fresh headless run seeded through random and np.random only
+    for name, value in (('RESUME', False), ('PLOT_MODE', 'off'), ('RECORD_EPISODES', False),
+                        ('LOG_POSITIONS', False), ('PIPELINED', False), ('PROFILE', False)):
+        monkeypatch.setattr(agent, name, value)
+    random.seed(0)
+    np.random.seed(0)
+    scores = []
+    agent.train(headless=True, max_games=n_games, on_game=lambda n_games, score, record: scores.append(score))
+    return scores
+
+def test_default_settings_learn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # train() writes logs and checkpoints to ./data
+    scores = _train_scores(N_GAMES, monkeypatch)
+
+    assert len(scores) == N_GAMES
+    assert np.mean(scores[-50:]) >= MIN_MEAN_SCORE
+
+def test_seeded_runs_repeat(tmp_path, monkeypatch):
+    # Replay sampling follows np.random.seed, so two runs play the same games
+    monkeypatch.chdir(tmp_path)
+    first = _train_scores(100, monkeypatch)
+    second = _train_scores(100, monkeypatch)
+
+    assert first == second
@@ -0,0 +1,66 @@
+import os
+import random
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+pygame = pytest.importorskip('pygame')
+
+from game import SnakeGameAI, Direction, Point, BLOCK_SIZE
+from renderer import PygameRenderer
+
+# The incremental renderer must leave exactly the pixels of a full
+# _update_ui redraw after every frame, including frames where the food
+# or the snake is under the score text.
+N_GAMES = 400
+EXPLORE = 0.3 # share of random moves; keeps games short
+
+CLOCK_WISE = [Direction.RIGHT, Direction.DOWN, Direction.LEFT, Direction.UP]
+STEP = {Direction.RIGHT: (1, 0), Direction.DOWN: (0, 1), Direction.LEFT: (-1, 0), Direction.UP: (0, -1)}
+ACTIONS = ([1, 0, 0], [0, 1, 0], [0, 0, 1])
+
+def _choose(game, rng):
+    # Mostly greedy towards the food while avoiding collisions, so games run
+    # long enough for the score text and the snake to change
+    idx = CLOCK_WISE.index(game.direction)
+    options = []
+    for action, turn in zip(ACTIONS, (0, 1, -1)):
+        dx, dy = STEP[CLOCK_WISE[(idx + turn) % 4]]
+        head = Point(game.head.x + dx * BLOCK_SIZE, game.head.y + dy * BLOCK_SIZE)
+        if not game.is_collision(head):
+            options.append((abs(head.x - game.food.x) + abs(head.y - game.food.y), action))
+    if not options or rng.random() < EXPLORE:
+        return rng.choice(ACTIONS)
+    return min(options)[1]
+
+def _same_pixels(a, b):
+    # Compares the raw pixel buffers in place (both surfaces have the same format)
+    return np.array_equal(np.frombuffer(a.get_buffer(), np.uint8), np.frombuffer(b.get_buffer(), np.uint8))
+
+def test_incremental_matches_full_redraw():
+    game = SnakeGameAI(headless=True, seed=0)
+    renderer = PygameRenderer(game.w, game.h, BLOCK_SIZE, speed=0, incremental=True)
+    reference = PygameRenderer(game.w, game.h, BLOCK_SIZE, speed=0, incremental=False)
+    # Off-screen targets, so the two renderers do not share the display
+    renderer.display = pygame.Surface((game.w, game.h))
+    reference.display = pygame.Surface((game.w, game.h))
+    game.attach_renderer(renderer)
+    rng = random.Random(0)
+
+    mismatches = []
+    frames = 0
+    for game_no in range(1, N_GAMES + 1):
+        game.reset()
+        done = False
+        while not done:
+            _, done, _, _, _ = game.play_step(_choose(game, rng), game_no)
+            if done:
+                break
+            reference._update_ui(game, game_no)
+            frames += 1
+            if not _same_pixels(renderer.display, reference.display):
+                mismatches.append((game_no, game.frame_iteration, game.food))
+
+    assert frames > 10 * N_GAMES
+    assert mismatches == []
@@ -0,0 +1,175 @@
+import numpy as np
+from game import BLOCK_SIZE
+from observation import rich_features, WINDOW
+
+# Directions in clockwise order, matching SnakeGameAI._move
+RIGHT, DOWN, LEFT, UP = 0, 1, 2, 3
+DX = np.array([1, 0, -1, 0])
+DY = np.array([0, 1, 0, -1])
+
+# Death reason codes returned by step(); DEATH_REASONS maps them back to
+# the strings used by SnakeGameAI.play_step and the CSV logs
+ALIVE, WALL, SELF, TIMEOUT = 0, 1, 2, 3
+DEATH_REASONS = [None, 'Collision_Wall', 'Collision_Self', 'Timeout']
+
+class VecSnakeGame:
+    # N snake games stepped in lockstep on NumPy arrays. Coordinates are in
+    # grid cells (multiply by BLOCK_SIZE for pixels). Finished games are reset
+    # automatically inside step().
+    def __init__(self, n_games, w=640, h=480, seed=None):
+        self.n = n_games
+        self.cols = w // BLOCK_SIZE
+        self.rows = h // BLOCK_SIZE
+        self.n_cells = self.cols * self.rows
+        self.rng = np.random.default_rng(seed)
+        self._idx = np.arange(self.n)
+
+        # Occupancy grid and ring-buffer body (flat cell indices, head at head_ptr)
+        self.occupied = np.zeros((self.n, self.rows, self.cols), dtype=bool)
+        self.body = np.zeros((self.n, self.n_cells), dtype=np.int32)
+        self.head_ptr = np.zeros(self.n, dtype=np.int64)
+        self.length = np.zeros(self.n, dtype=np.int64)
+
+        self.head_x = np.zeros(self.n, dtype=np.int64)
+        self.head_y = np.zeros(self.n, dtype=np.int64)
+        self.direction = np.zeros(self.n, dtype=np.int64)
+        self.food_x = np.zeros(self.n, dtype=np.int64)
+        self.food_y = np.zeros(self.n, dtype=np.int64)
+
+        self.score = np.zeros(self.n, dtype=np.int64)
+        self.frame_iteration = np.zeros(self.n, dtype=np.int64)
+        self.steps_per_food = np.zeros(self.n, dtype=np.int64)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        # Reset all games, or only those where mask is True
+        idx = self._idx if mask is None else np.flatnonzero(mask)
+        if len(idx) == 0:
+            return
+
+        cx, cy = self.cols // 2, self.rows // 2
+        self.occupied[idx] = False
+        self.direction[idx] = RIGHT
+        self.head_x[idx] = cx
+        self.head_y[idx] = cy
+        self.length[idx] = 3
+        self.head_ptr[idx] = 2
+        # Tail first, head last in the ring buffer
+        for k, x in enumerate((cx - 2, cx - 1, cx)):
+            self.body[idx, k] = cy * self.cols + x
+            self.occupied[idx, cy, x] = True
+
+        self.score[idx] = 0
+        self.frame_iteration[idx] = 0
+        self.steps_per_food[idx] = 0
+        self._place_food(idx)
+
+    def _place_food(self, idx):
+        # Vectorized rejection sampling; games that keep missing (nearly full
+        # boards) fall back to drawing from their list of free cells.
+        pending = idx
+        for _ in range(8):
+            if len(pending) == 0:
+                return
+            cells = self.rng.integers(0, self.n_cells, size=len(pending))
+            ys, xs = np.divmod(cells, self.cols)
+            free = ~self.occupied[pending, ys, xs]
+            self.food_x[pending[free]] = xs[free]
+            self.food_y[pending[free]] = ys[free]
+            pending = pending[~free]
+
+        for i in pending:
+            free_cells = np.flatnonzero(~self.occupied[i].ravel())
+            if len(free_cells) == 0:
+                # Board is full; park the food off-grid so it can never be eaten
+                self.food_x[i] = self.food_y[i] = -1
+                continue
+            self.food_y[i], self.food_x[i] = divmod(self.rng.choice(free_cells), self.cols)
+
+    def _is_collision(self, x, y):
+        out = (x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows)
+        xc = np.clip(x, 0, self.cols - 1)
+        yc = np.clip(y, 0, self.rows - 1)
+        return out | self.occupied[self._idx, yc, xc]
+
+    def step(self, actions):
+        # actions: (N, 3) one-hot [straight, right, left] like SnakeGameAI.play_step.
+        # Returns rewards, dones, scores, steps_per_food and death reason codes,
+        # all as (N,) arrays; scores are the values before auto-reset.
+        move = np.argmax(actions, axis=1)
+        turn = np.where(move == 0, 0, np.where(move == 1, 1, -1))
+        self.direction = (self.direction + turn) % 4
+        self.frame_iteration += 1
+        self.steps_per_food += 1
+
+        nx = self.head_x + DX[self.direction]
+        ny = self.head_y + DY[self.direction]
+
+        wall = (nx < 0) | (nx >= self.cols) | (ny < 0) | (ny >= self.rows)
+        xc = np.clip(nx, 0, self.cols - 1)
+        yc = np.clip(ny, 0, self.rows - 1)
+        # The tail has not moved yet at this point, same as SnakeGameAI
+        hit_self = ~wall & self.occupied[self._idx, yc, xc]
+        timeout = ~wall & ~hit_self & (self.frame_iteration > 100 * (self.length + 1))
+
+        reasons = np.full(self.n, ALIVE, dtype=np.int8)
+        reasons[wall] = WALL
+        reasons[hit_self] = SELF
+        reasons[timeout] = TIMEOUT
+        dones = reasons != ALIVE
+        alive = ~dones
+
+        ate = alive & (nx == self.food_x) & (ny == self.food_y)
+        rewards = np.where(dones, -10.0, np.where(ate, 10.0, 0.0))
+
+        # Vacate the tail of every surviving game that did not eat
+        moved = np.flatnonzero(alive & ~ate)
+        tail = self.body[moved, (self.head_ptr[moved] - self.length[moved] + 1) % self.n_cells]
+        ty, tx = np.divmod(tail, self.cols)
+        self.occupied[moved, ty, tx] = False
+
+        # Push the new head of every surviving game
+        live = np.flatnonzero(alive)
+        self.head_ptr[live] = (self.head_ptr[live] + 1) % self.n_cells
+        self.body[live, self.head_ptr[live]] = ny[live] * self.cols + nx[live]
+        self.occupied[live, ny[live], nx[live]] = True
+        self.head_x[live] = nx[live]
+        self.head_y[live] = ny[live]
+
+        eaten = np.flatnonzero(ate)
+        self.length[eaten] += 1
+        self.score[eaten] += 1
+        self.steps_per_food[eaten] = 0
+        self._place_food(eaten)
+
+        scores = self.score.copy()
+        steps_per_food = self.steps_per_food.copy()
+        self.reset(dones)
+        return rewards, dones, scores, steps_per_food, reasons
+
+    def get_states(self, dtype=int, observation='basic', window=WINDOW):
+        # Vectorized Agent.get_state: (N, 11) matrix with the same feature order.
+        # observation='rich' appends the rays and local window (see observation.py)
+        # and returns float32 regardless of dtype.
+        if observation == 'rich':
+            return np.concatenate([self.get_states(np.float32),
+                                   rich_features(self.occupied, self.head_x, self.head_y, self.direction,
+                                                 self.food_x, self.food_y, window)], axis=1)
+        d = self.direction
+        states = np.empty((self.n, 11), dtype=dtype)
+        # Danger straight, right, left
+        for col, rel in enumerate((0, 1, -1)):
+            nd = (d + rel) % 4
+            states[:, col] = self._is_collision(self.head_x + DX[nd], self.head_y + DY[nd])
+        # Direction
+        states[:, 3] = d == LEFT
+        states[:, 4] = d == RIGHT
+        states[:, 5] = d == UP
+        states[:, 6] = d == DOWN
+        # Food
+        states[:, 7] = self.food_x < self.head_x
+        states[:, 8] = self.food_x > self.head_x
+        states[:, 9] = self.food_y < self.head_y
+        states[:, 10] = self.food_y > self.head_y
+        return states
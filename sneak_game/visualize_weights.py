@@ -3,7 +3,7 @@ import matplotlib.pyplot as plt
 import os
 
 def visualize_w1():
-    path = './model/model.npz'
+    path = './data/model_weights.npz'
     if not os.path.exists(path):
         print(f"Model file not found at {path}. Train the agent first!")
         return